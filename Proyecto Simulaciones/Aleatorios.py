@@ -0,0 +1,130 @@
+import math
+import zlib
+import numpy as np
+
+# Cantidad de números que un flujo sortea de una vez para las llamadas escalares
+TAMANO_BLOQUE = 4096
+
+# Mayor doble menor que 1: tope de los uniformes transformados, para que
+# entero() no se pase del máximo
+ULTIMO_UNIFORME = float(np.nextafter(1.0, 0.0))
+
+
+class Flujo:
+    # Subflujo independiente de uniformes. Sortea por bloques con NumPy, de modo que
+    # pedir de a uno cuesta poco y pedir n de una vez devuelve exactamente los mismos
+    # números que n llamadas escalares. Todas las distribuciones salen por inversión
+    # de un único uniforme.
+    # Con antitetico cada uniforme u se entrega como 1 - u. Con estrato = (i, m,
+    # secuencia_comun) el flujo es la réplica i de un hipercubo latino de m
+    # réplicas: en cada posición j entrega (π_j(i) + u) / m, con π_j una
+    # permutación de 0..m-1 que sale de secuencia_comun y depende sólo de j, así
+    # que las m réplicas cubren los m estratos en cada sorteo. Cada réplica por
+    # separado sigue siendo una sucesión de uniformes independientes
+    def __init__(self, secuencia, antitetico=False, estrato=None):
+        self.generador = np.random.Generator(np.random.PCG64(secuencia))
+        self.bloque = []
+        self.posicion = 0
+        self.antitetico = antitetico
+        self.estrato = estrato
+        self.sorteados = 0  # posición del próximo uniforme que sale del generador
+        self._trozo = -1
+        self._estratos = None
+
+    def _sortear(self, n):
+        u = self.generador.random(n)
+        if self.estrato is not None:
+            u = (self._estratos_de(self.sorteados, n) + u) / self.estrato[1]
+        if self.antitetico:
+            u = 1.0 - u
+        if self.estrato is not None or self.antitetico:
+            u = np.minimum(u, ULTIMO_UNIFORME)
+        self.sorteados += n
+        return u
+
+    def _estratos_de(self, inicio, n):
+        # π_j(i) para j en [inicio, inicio + n). Las permutaciones se generan por
+        # trozos de TAMANO_BLOQUE posiciones con su propia semilla, así no
+        # dependen de cómo pida números cada réplica
+        i, m, comun = self.estrato
+        partes = []
+        while n > 0:
+            trozo, desde = divmod(inicio, TAMANO_BLOQUE)
+            if trozo != self._trozo:
+                generador = np.random.Generator(np.random.PCG64(
+                    np.random.SeedSequence(comun.entropy, spawn_key=tuple(comun.spawn_key) + (trozo,))))
+                claves = generador.random((TAMANO_BLOQUE, m))
+                # Rango de la clave i en su fila: la columna i de permutaciones al azar
+                self._estratos = (claves < claves[:, i:i + 1]).sum(axis=1)
+                self._trozo = trozo
+            k = min(n, TAMANO_BLOQUE - desde)
+            partes.append(self._estratos[desde:desde + k])
+            inicio += k
+            n -= k
+        return np.concatenate(partes) if len(partes) != 1 else partes[0]
+
+    def __getstate__(self):
+        # Para los puntos de control: sólo lo que falta consumir del bloque, sin
+        # la caché de permutaciones (se regenera igual)
+        estado = self.__dict__.copy()
+        estado["bloque"] = self.bloque[self.posicion:]
+        estado["posicion"] = 0
+        estado["_trozo"], estado["_estratos"] = -1, None
+        return estado
+
+    def uniforme(self):
+        if self.posicion >= len(self.bloque):
+            self.bloque = self._sortear(TAMANO_BLOQUE).tolist()
+            self.posicion = 0
+        u = self.bloque[self.posicion]
+        self.posicion += 1
+        return u
+
+    def uniformes(self, n):
+        restantes = self.bloque[self.posicion:self.posicion + n]
+        self.posicion += len(restantes)
+        if len(restantes) == n:
+            return np.array(restantes)
+        return np.concatenate([np.array(restantes, dtype=float), self._sortear(n - len(restantes))])
+
+    def exponencial(self, media):
+        # 1 - u evita log(0); sigue siendo uniforme en (0, 1]
+        return -media * math.log(1.0 - self.uniforme())
+
+    def exponenciales(self, media, n):
+        return -media * np.log(1.0 - self.uniformes(n))
+
+    def entero(self, minimo, maximo):
+        # Entero uniforme en [minimo, maximo], ambos incluidos (como random.randint)
+        return minimo + int((maximo - minimo + 1) * self.uniforme())
+
+    def enteros(self, minimo, maximo, n):
+        return minimo + ((maximo - minimo + 1) * self.uniformes(n)).astype(np.int64)
+
+
+class FlujosAleatorios:
+    # Generadores propios de una instancia de modelo. Cada nombre ("llegadas",
+    # "servicio"...) es un subflujo derivado de la semilla con SeedSequence, así
+    # dos modelos en el mismo proceso no se pisan y cada flujo es reproducible
+    # sin importar el orden en que se usen los demás. antitetico y estrato =
+    # (i, m, semilla_comun) se aplican a todos los flujos (ver Flujo)
+    def __init__(self, semilla, antitetico=False, estrato=None):
+        if isinstance(semilla, np.random.SeedSequence):
+            self.entropia, self.clave = semilla.entropy, tuple(semilla.spawn_key)
+        else:
+            self.entropia, self.clave = semilla % (1 << 64), ()
+        self.antitetico = antitetico
+        self.estrato = estrato
+        self.flujos = {}
+
+    def __getitem__(self, nombre):
+        flujo = self.flujos.get(nombre)
+        if flujo is None:
+            clave = zlib.crc32(nombre.encode())
+            secuencia = np.random.SeedSequence(self.entropia, spawn_key=self.clave + (clave,))
+            estrato = None
+            if self.estrato is not None:
+                i, m, comun = self.estrato
+                estrato = (i, m, np.random.SeedSequence(comun % (1 << 64), spawn_key=(clave,)))
+            flujo = self.flujos[nombre] = Flujo(secuencia, self.antitetico, estrato)
+        return flujo
@@ -0,0 +1,235 @@
+import os
+import math
+import numpy as np
+from Replicas import derivar_semillas, resumir, ejecutar_en_paralelo
+
+# Fórmulas de colas para barrer parámetros sin simular. Todas devuelven un dict
+# con utilizacion (por servidor), prob_perdida, espera_media (en cola),
+# cola_media y el método usado; los tiempos van en la unidad de los parámetros
+
+
+def erlang_b(c, a):
+    # Probabilidad de bloqueo de M/M/c/c con carga ofrecida a = λ/μ (recurrencia estable)
+    b = 1.0
+    for k in range(1, c + 1):
+        b = a * b / (k + a * b)
+    return b
+
+
+def erlang_c(c, a):
+    # Probabilidad de esperar en M/M/c
+    if a >= c:
+        return 1.0
+    b = erlang_b(c, a)
+    return c * b / (c - a * (1 - b))
+
+
+def mmc(tasa_llegadas, tasa_servicio, c):
+    a = tasa_llegadas / tasa_servicio
+    rho = a / c
+    if rho >= 1:
+        return {"utilizacion": 1.0, "prob_perdida": 0.0, "prob_espera": 1.0, "espera_media": math.inf,
+                "cola_media": math.inf, "metodo": "M/M/c"}
+    espera = erlang_c(c, a)
+    wq = espera / (c * tasa_servicio - tasa_llegadas)
+    return {"utilizacion": rho, "prob_perdida": 0.0, "prob_espera": espera, "espera_media": wq,
+            "cola_media": tasa_llegadas * wq, "metodo": "M/M/c"}
+
+
+def mmck(tasa_llegadas, tasa_servicio, c, K):
+    # M/M/c/K exacto (K = lugares en el sistema, servidores incluidos). Las
+    # probabilidades se arman en escala logarítmica para soportar K grandes
+    a = tasa_llegadas / tasa_servicio
+    n = np.arange(1, K + 1)
+    log_p = np.concatenate([[0.0], np.cumsum(np.log(a / np.minimum(n, c)))])
+    p = np.exp(log_p - log_p.max())
+    p /= p.sum()
+    perdida = float(p[K])
+    efectiva = tasa_llegadas * (1 - perdida)
+    cola = float((np.maximum(np.arange(K + 1) - c, 0) * p).sum())
+    return {"utilizacion": efectiva / (c * tasa_servicio), "prob_perdida": perdida,
+            "prob_espera": float(p[c:K].sum() / (1 - perdida)), "espera_media": cola / efectiva,
+            "cola_media": cola, "metodo": "M/M/c/K"}
+
+
+def mg1k(tasa_llegadas, valores, probabilidades, K):
+    # M/G/1/K exacto para un servicio discreto (valores con sus probabilidades):
+    # cadena embebida en las salidas y paso a probabilidades en tiempo continuo
+    valores = np.asarray(valores, dtype=float)
+    probabilidades = np.asarray(probabilidades, dtype=float)
+    media = float((valores * probabilidades).sum())
+    rho = tasa_llegadas * media
+
+    # a[k] = P(k llegadas durante un servicio)
+    k = np.arange(K)
+    log_factorial = np.array([math.lgamma(i + 1) for i in range(K)])
+    carga = tasa_llegadas * valores[:, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        poisson = np.exp(-carga + k * np.log(carga) - log_factorial)
+    poisson[:, 0] = np.exp(-carga[:, 0])
+    a = probabilidades @ poisson
+
+    P = np.zeros((K, K))
+    for i in range(K):
+        desde = max(i - 1, 0)
+        P[i, desde:K - 1] = a[:K - 1 - desde]
+        P[i, K - 1] = 1 - P[i, :K - 1].sum()
+    # pi (P - I) = 0 con la suma igual a 1
+    sistema = np.vstack([(P - np.eye(K)).T[:-1], np.ones(K)])
+    pi = np.linalg.solve(sistema, np.concatenate([np.zeros(K - 1), [1.0]]))
+
+    p = np.empty(K + 1)
+    p[:K] = pi / (pi[0] + rho)
+    p[K] = 1 - 1 / (pi[0] + rho)
+    perdida = float(p[K])
+    efectiva = tasa_llegadas * (1 - perdida)
+    en_sistema = float((np.arange(K + 1) * p).sum())
+    wq = en_sistema / efectiva - media
+    return {"utilizacion": efectiva * media, "prob_perdida": perdida, "prob_espera": float(p[1:K].sum() / (1 - perdida)),
+            "espera_media": wq, "cola_media": efectiva * wq, "metodo": "M/G/1/K"}
+
+
+def allen_cunneen(tasa_llegadas, media_servicio, cv2_llegadas, cv2_servicio, c):
+    # G/G/c: la espera de M/M/c escalada por (ca² + cs²) / 2. Con c = 1 es la
+    # aproximación de Kingman, y con llegadas de Poisson la fórmula de Pollaczek-Khinchine
+    base = mmc(tasa_llegadas, 1 / media_servicio, c)
+    factor = (cv2_llegadas + cv2_servicio) / 2
+    wq = base["espera_media"] * factor
+    return {"utilizacion": base["utilizacion"], "prob_perdida": 0.0, "prob_espera": base["prob_espera"],
+            "espera_media": wq, "cola_media": tasa_llegadas * wq, "metodo": "Allen-Cunneen"}
+
+
+def mgck(tasa_llegadas, media_servicio, cv2_servicio, c, K):
+    # Aproximación de M/G/c/K: la cola del sistema infinito se toma geométrica,
+    # P(L >= c + k) = C·τ^k, con C de Erlang y τ tal que la cola media coincida
+    # con Allen-Cunneen; luego se trunca en K con la relación de Tijms, que es
+    # exacta en M/G/1/K: pérdida = (1 - ρ)·q / (1 - ρ·q), con q = P(L >= K)
+    # Sin sistema infinito estable (ρ >= 1) se usa M/M/c/K
+    rho = tasa_llegadas * media_servicio / c
+    if rho >= 1:
+        resultado = mmck(tasa_llegadas, 1 / media_servicio, c, K)
+        resultado["metodo"] = "M/M/c/K (sobrecarga)"
+        return resultado
+    infinito = allen_cunneen(tasa_llegadas, media_servicio, 1.0, cv2_servicio, c)
+    espera = infinito["prob_espera"]
+    tau = infinito["cola_media"] / (espera + infinito["cola_media"])
+    q = espera * tau ** (K - c)
+    perdida = (1 - rho) * q / (1 - rho * q)
+    escala = (1 - perdida) / (1 - q)  # reparte en los estados < K lo que queda de probabilidad
+    k = np.arange(1, K - c)
+    cola = float(escala * espera * (1 - tau) * (k * tau ** k).sum())
+    efectiva = tasa_llegadas * (1 - perdida)
+    return {"utilizacion": efectiva * media_servicio / c, "prob_perdida": perdida,
+            "prob_espera": espera * (1 - tau ** (K - c)) * escala / (1 - perdida),
+            "espera_media": cola / efectiva, "cola_media": cola, "metodo": "M/G/c/K (Tijms)"}
+
+
+def kingman(tasa_llegadas, media_servicio, cv2_llegadas, cv2_servicio):
+    rho = tasa_llegadas * media_servicio
+    if rho >= 1:
+        wq = math.inf
+    else:
+        wq = rho / (1 - rho) * (cv2_llegadas + cv2_servicio) / 2 * media_servicio
+    return {"utilizacion": min(rho, 1.0), "prob_perdida": 0.0, "prob_espera": min(rho, 1.0),
+            "espera_media": wq, "cola_media": tasa_llegadas * wq, "metodo": "Kingman"}
+
+
+def uniforme_discreta(minimo, maximo):
+    # Valores y probabilidades de un entero uniforme en [minimo, maximo] (randint)
+    valores = np.arange(minimo, maximo + 1, dtype=float)
+    return valores, np.full(len(valores), 1 / len(valores))
+
+
+def momentos(valores, probabilidades):
+    media = float((valores * probabilidades).sum())
+    varianza = float(((valores - media) ** 2 * probabilidades).sum())
+    return media, varianza / (media * media)
+
+
+"""
+Parámetros de los modelos del proyecto
+"""
+
+
+def analizar_red(capacidad_servidor, capacidad_cola, tiempo_procesamiento_min, tiempo_procesamiento_max,
+                 tiempo_llegadas):
+    # SimulacionRed descarta el paquete que encolado deja capacidad_cola paquetes en
+    # la cola (contándose), así que caben capacidad_servidor + capacidad_cola - 1
+    K = capacidad_servidor + capacidad_cola - 1
+    tasa = 1 / tiempo_llegadas
+    valores, probabilidades = uniforme_discreta(tiempo_procesamiento_min, tiempo_procesamiento_max)
+    if capacidad_servidor == 1:
+        return mg1k(tasa, valores, probabilidades, K)
+    media, cv2 = momentos(valores, probabilidades)
+    return mgck(tasa, media, cv2, capacidad_servidor, K)
+
+
+def analizar_peluqueria(num_peluqueros, tiempo_corte_min, tiempo_corte_max, t_llegadas):
+    # Corte uniforme continuo; devuelve también lpc, tep y upi como la simulación
+    media = (tiempo_corte_min + tiempo_corte_max) / 2
+    cv2 = (tiempo_corte_max - tiempo_corte_min) ** 2 / 12 / (media * media)
+    resultado = allen_cunneen(1 / t_llegadas, media, 1.0, cv2, num_peluqueros)
+    resultado.update(lpc=resultado["cola_media"], tep=resultado["espera_media"], upi=resultado["utilizacion"])
+    return resultado
+
+
+def analizar_restaurante(num_mesas, tiempo_comer_min, tiempo_comer_max, tiempo_llegadas):
+    media, cv2 = momentos(*uniforme_discreta(tiempo_comer_min, tiempo_comer_max))
+    return allen_cunneen(1 / tiempo_llegadas, media, 1.0, cv2, num_mesas)
+
+
+"""
+Contraste con simulación de algunos puntos del barrido
+"""
+
+
+def _replicas_red(tarea):
+    # Un grupo de réplicas en lotes (mismos números que SimulacionRed con cada semilla)
+    from RedColas import replicas_red
+    semillas, parametros, total_paquetes = tarea
+    resultados = replicas_red(semillas, *parametros, total_paquetes)
+    return [{
+        "prob_perdida": float(resultados["tasa_perdida"][i]),
+        "espera_media": float(resultados["espera_media"][i]),
+        "utilizacion": float(resultados["utilizacion"][i]) / parametros[0],
+    } for i in range(len(semillas))]
+
+
+def contrastar_red(parametros, total_paquetes=20000, replicas=5, semilla=1, procesos=None, confianza=0.95):
+    # parametros = (capacidad_servidor, capacidad_cola, tiempo_procesamiento_min,
+    # tiempo_procesamiento_max, tiempo_llegadas). Devuelve el resumen de las
+    # réplicas por indicador y si el valor analítico cae en cada intervalo
+    analitico = analizar_red(*parametros)
+    # Un grupo de semillas por proceso
+    semillas = derivar_semillas(semilla, replicas)
+    grupos = min(procesos or os.cpu_count() or 1, replicas)
+    tareas = [(semillas[i::grupos], parametros, total_paquetes) for i in range(grupos)]
+    resultados = [r for grupo in ejecutar_en_paralelo(_replicas_red, tareas, procesos) for r in grupo]
+    simulado = {}
+    for indicador in ("prob_perdida", "espera_media", "utilizacion"):
+        r = resumir([x[indicador] for x in resultados], confianza)
+        r["analitico"] = analitico[indicador]
+        r["dentro"] = r["ic"][0] <= analitico[indicador] <= r["ic"][1]
+        simulado[indicador] = r
+    return simulado
+
+
+def barrido_red(puntos, contrastar=(), **opciones):
+    # Evalúa analíticamente cada punto y simula sólo los índices de `contrastar`;
+    # las opciones pasan a contrastar_red
+    puntos = list(puntos)
+    filas = [analizar_red(*p) for p in puntos]
+    for i in contrastar:
+        filas[i]["contraste"] = contrastar_red(puntos[i], **opciones)
+    return filas
+
+
+if __name__ == "__main__":
+    puntos = [(c, q, 2, 5, t) for c in (1, 2) for q in (3, 5, 10) for t in (2, 3, 4)]
+    filas = barrido_red(puntos, contrastar=(4, 13), total_paquetes=20000, replicas=8)
+    print(f"{'c':>2} {'cola':>4} {'t_lleg':>6}  {'pérdida':>8} {'espera':>8} {'utiliz.':>8}  método")
+    for p, f in zip(puntos, filas):
+        print(f"{p[0]:>2} {p[1]:>4} {p[4]:>6}  {f['prob_perdida']:8.4f} {f['espera_media']:8.3f} {f['utilizacion']:8.4f}  {f['metodo']}")
+        for indicador, r in f.get("contraste", {}).items():
+            print(f"      simulado {indicador}: {r['media']:.4f} IC [{r['ic'][0]:.4f}, {r['ic'][1]:.4f}]"
+                  f" {'contiene' if r['dentro'] else 'NO contiene'} {r['analitico']:.4f}")
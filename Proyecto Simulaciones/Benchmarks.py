@@ -0,0 +1,207 @@
+import os
+import sys
+import io
+import json
+import time
+import argparse
+import importlib
+import subprocess
+import contextlib
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+
+# Caso -> (módulo que se importa, tamaños del problema)
+CASOS = {
+    "peluqueria": ("DiscretaPeluqueria", [1000, 10000, 100000]),
+    "peluqueria_vectorizada": ("DiscretaPeluqueria", [100000, 1000000, 10000000]),
+    "restaurante": ("DiscretaRestaurante2", [1000, 10000, 100000]),
+    "red": ("DiscretaSistemaRedes", [1000, 10000, 100000]),
+    "red_colas": ("RedColas", [10000, 100000, 1000000]),
+    "red_replicas": ("RedColas", [10, 100, 1000]),
+    "drive_thru_2": ("DiscretaRestaurante", [2, 6, 12]),
+    "drive_thru_3": ("DiscretaRestaurante", [2, 6, 12]),
+    "drive_thru_kernel_2": ("DiscretaRestaurante", [12, 240, 2400]),
+    "drive_thru_kernel_3": ("DiscretaRestaurante", [12, 240, 2400]),
+    "reaccion_quimica": ("ContinuoReaccionQuimica", [10, 100, 1000]),
+    "reactor_nuclear": ("ContinuoReactorNuclear", [1000, 10000, 100000]),
+}
+
+
+def instrumentar_simpy():
+    # Los modelos crean su simpy.Environment internamente; dentro del proceso de
+    # medición se reemplaza por una subclase que sólo anota cada entorno creado.
+    # No se agrega nada por evento, para no frenar a los motores de simpy frente
+    # a los que no lo usan; los eventos se cuentan al final con contar_eventos
+    import simpy
+    entornos = []
+
+    class EntornoContado(simpy.Environment):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            entornos.append(self)
+
+    simpy.Environment = EntornoContado
+    return entornos
+
+
+def contar_eventos(entornos):
+    # Cada entorno numera sus eventos con un contador (_eid): el próximo número
+    # es la cantidad de eventos agendados
+    return sum(next(entorno._eid) for entorno in entornos)
+
+
+def contar_llamadas(funcion, contador):
+    def envoltura(*args):
+        contador[0] += 1
+        return funcion(*args)
+    return envoltura
+
+
+def correr_caso(caso, tamano):
+    # Devuelve (segundos de importación, segundos de simulación, eventos, unidad)
+    modulo, _ = CASOS[caso]
+    nulo = io.StringIO()
+
+    # La importación se mide antes de instrumentar, así incluye la de simpy
+    inicio = time.perf_counter()
+    m = importlib.import_module(modulo)
+    importacion = time.perf_counter() - inicio
+    entornos = instrumentar_simpy()
+
+    # Los eventos de simpy se cuentan solos; el resto informa su propia unidad
+    eventos, unidad = None, "eventos"
+    llamadas = [0]
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(nulo):
+        if caso == "peluqueria":
+            m.SimulacionPeluqueria(42, 2, 15, 30, 12, tamano, traza=False).ejecutar_simulacion()
+        elif caso == "peluqueria_vectorizada":
+            m.SimulacionPeluqueria(42, 2, 15, 30, 12, tamano, vectorizado=True, traza=False).ejecutar_simulacion()
+            eventos = 2 * tamano  # equivalente: una llegada y una salida por cliente
+        elif caso == "restaurante":
+            m.RestauranteSimulacion(42, 5, 20, 40, 7, tamano).run()
+        elif caso == "red":
+            m.SimulacionRed(42, 1, 5, 2, 5, 3, tamano).ejecutar()
+        elif caso == "red_colas":
+            # Cuatro etapas del modelo de red en serie; sin simpy, cuenta servicios
+            resultado = m.serie(42, 4, 1, 5, 2, 5, 3, tamano).ejecutar()
+            eventos, unidad = int(resultado["atendidos"].sum()), "servicios"
+        elif caso == "red_replicas":
+            # `tamano` réplicas del caso "red" de 5000 paquetes, en lotes
+            m.replicas_red(list(range(tamano)), 1, 5, 2, 5, 3, 5000)
+            eventos, unidad = 5000 * tamano, "paquetes"
+        elif caso.startswith("drive_thru"):
+            # Abre a las 0 y cierra a las `tamano` horas
+            config = m.DriveThruConfig(hour_open=0, hour_close=tamano, peak_start=0, peak_end=1,
+                                       num_counters=int(caso[-1]), customer_range_norm=(1, 4),
+                                       customer_range_peak=(1, 4))
+            resultado = m.DriveThruModel(config, kernel="kernel" in caso).run()
+            if "kernel" in caso:
+                eventos, unidad = resultado.customers, "clientes"
+        elif caso == "reaccion_quimica":
+            for _ in range(tamano):
+                reaccion = m.ReaccionQuimica(0.1, 1.0)
+                reaccion.modelo = contar_llamadas(reaccion.modelo, llamadas)
+                reaccion.simular()
+            eventos, unidad = llamadas[0], "evaluaciones"
+        elif caso == "reactor_nuclear":
+            simulacion = m.SimulacionTermica(1000, 0.1, 25, 500, 300)
+            simulacion.modelo = contar_llamadas(simulacion.modelo, llamadas)
+            simulacion.simular(m.np.linspace(0, 100, tamano))
+            eventos, unidad = llamadas[0], "evaluaciones"
+    segundos = time.perf_counter() - inicio
+    if eventos is None:
+        eventos = contar_eventos(entornos)
+    return importacion, segundos, eventos, unidad
+
+
+def medir(caso, tamano, repeticiones=1):
+    # Corre el caso en un proceso nuevo para medir importación y memoria en frío;
+    # con varias repeticiones se queda con la más rápida para reducir el ruido
+    mejor = None
+    for _ in range(repeticiones):
+        salida = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--trabajador", caso, str(tamano)],
+            cwd=DIRECTORIO, capture_output=True, text=True, check=True)
+        r = json.loads(salida.stdout.strip().splitlines()[-1])
+        if mejor is None or r["tiempo_s"] < mejor["tiempo_s"]:
+            mejor = r
+    return mejor
+
+
+def trabajador(caso, tamano):
+    importacion, segundos, eventos, unidad = correr_caso(caso, tamano)
+    memoria = None
+    if resource is not None:
+        memoria = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB -> MiB en Linux
+    print(json.dumps({
+        "caso": caso,
+        "tamano": tamano,
+        "importacion_s": importacion,
+        "tiempo_s": segundos,
+        "eventos": eventos,
+        "unidad": unidad,
+        "eventos_por_segundo": eventos / segundos if segundos > 0 else None,
+        "memoria_pico_mb": memoria,
+    }))
+
+
+def comparar(resultados, base, tolerancia):
+    # Marca como regresión toda caída de eventos/segundo mayor que la tolerancia
+    anteriores = {(r["caso"], r["tamano"]): r for r in base["resultados"]}
+    regresiones = []
+    for r in resultados:
+        anterior = anteriores.get((r["caso"], r["tamano"]))
+        if anterior is None or not anterior["eventos_por_segundo"] or not r["eventos_por_segundo"]:
+            continue
+        relacion = r["eventos_por_segundo"] / anterior["eventos_por_segundo"]
+        marca = ""
+        if relacion < 1 - tolerancia:
+            marca = "  <-- REGRESIÓN"
+            regresiones.append(r)
+        print(f"{r['caso']:<24}{r['tamano']:>10}  {relacion:6.2f}x{marca}")
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de los modelos de simulación")
+    parser.add_argument("--casos", nargs="+", choices=list(CASOS), default=list(CASOS))
+    parser.add_argument("--rapido", action="store_true", help="sólo el tamaño más chico de cada caso")
+    parser.add_argument("--salida", default="benchmarks.json")
+    parser.add_argument("--comparar", metavar="BASE", help="JSON de una corrida anterior")
+    parser.add_argument("--tolerancia", type=float, default=0.10)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--trabajador", nargs=2, metavar=("CASO", "TAMANO"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.trabajador:
+        trabajador(args.trabajador[0], int(args.trabajador[1]))
+        return 0
+
+    resultados = []
+    for caso in args.casos:
+        tamanos = CASOS[caso][1][:1] if args.rapido else CASOS[caso][1]
+        for tamano in tamanos:
+            r = medir(caso, tamano, args.repeticiones)
+            resultados.append(r)
+            print(f"{caso:<24}{tamano:>10}  {r['tiempo_s']:8.3f} s  {r['eventos_por_segundo']:12.0f} {r['unidad']}/s"
+                  f"  import {r['importacion_s']:.3f} s  pico {r['memoria_pico_mb'] or 0:.1f} MB")
+
+    with open(args.salida, "w", encoding="utf-8") as archivo:
+        json.dump({"python": sys.version, "resultados": resultados}, archivo, indent=2)
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as archivo:
+            base = json.load(archivo)
+        if comparar(resultados, base, args.tolerancia):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
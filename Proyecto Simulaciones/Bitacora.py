@@ -0,0 +1,131 @@
+import csv
+from array import array
+import numpy as np
+
+# Niveles: con SILENCIO el modelo corre sin formatear ni escribir nada
+SILENCIO, RESUMEN, EVENTOS = 0, 1, 2
+
+# Formato de cada registro en los archivos binarios (leer con np.fromfile)
+REGISTRO = np.dtype([("tiempo", "<f8"), ("codigo", "<i2"), ("entidad", "<i8"), ("valor", "<f8")])
+
+
+class Bitacora:
+    # Los modelos consultan los atributos `eventos` y `resumen` antes de llamar:
+    #     if bitacora.eventos:
+    #         bitacora.evento(env.now, LLEGADA, numero)
+    # así, con el nivel apagado, cada paso cuesta sólo esa comparación. Los
+    # eventos viajan como (tiempo, codigo, entidad, valor) y es el sumidero el que
+    # decide si los convierte en texto o los guarda como registros
+    def __init__(self, nivel=SILENCIO, sumidero=None):
+        self.nivel = nivel if sumidero is not None else SILENCIO
+        self.sumidero = sumidero
+        self.resumen = self.nivel >= RESUMEN
+        self.eventos = self.nivel >= EVENTOS
+
+    def evento(self, tiempo, codigo, entidad, valor=0.0):
+        self.sumidero.evento(tiempo, codigo, entidad, valor)
+
+    def mensaje(self, texto):
+        self.sumidero.mensaje(texto)
+
+    def cerrar(self):
+        if self.sumidero is not None:
+            self.sumidero.cerrar()
+
+
+# Bitácora por defecto de los modelos headless
+SIN_BITACORA = Bitacora()
+
+
+class SumideroTexto:
+    # Convierte cada evento en una línea con plantillas[codigo](tiempo, entidad, valor).
+    # Escribe en `salida` (p. ej. sys.stdout) o, si no hay, acumula en self.lineas
+    def __init__(self, plantillas, salida=None):
+        self.plantillas = plantillas
+        self.salida = salida
+        self.lineas = []
+
+    def evento(self, tiempo, codigo, entidad, valor):
+        self.mensaje(self.plantillas[codigo](tiempo, entidad, valor))
+
+    def mensaje(self, texto):
+        if self.salida is None:
+            self.lineas.append(texto)
+        else:
+            self.salida.write(texto + "\n")
+
+    def texto(self, inicio=0, cantidad=None):
+        fin = len(self.lineas) if cantidad is None else inicio + cantidad
+        return "\n".join(self.lineas[inicio:fin])
+
+    def cerrar(self):
+        pass
+
+
+class SumideroCSV:
+    # Registros estructurados en CSV, escritos en bloques de `tamano_bloque` filas
+    def __init__(self, ruta, nombres=None, tamano_bloque=65536):
+        self.archivo = open(ruta, "w", newline="", encoding="utf-8")
+        self.escritor = csv.writer(self.archivo)
+        self.escritor.writerow(["tiempo", "codigo", "entidad", "valor"])
+        # codigo -> nombre legible: un dict o la tupla indexada por código que
+        # exporta cada modelo (NOMBRES_EVENTOS / EVENT_NAMES)
+        nombres = nombres or {}
+        self.nombres = nombres if isinstance(nombres, dict) else dict(enumerate(nombres))
+        self.tamano_bloque = tamano_bloque
+        self.filas = []
+
+    def evento(self, tiempo, codigo, entidad, valor):
+        self.filas.append((tiempo, self.nombres.get(codigo, codigo), entidad, valor))
+        if len(self.filas) >= self.tamano_bloque:
+            self.vaciar()
+
+    def mensaje(self, texto):
+        pass
+
+    def vaciar(self):
+        self.escritor.writerows(self.filas)
+        self.filas = []
+
+    def cerrar(self):
+        self.vaciar()
+        self.archivo.close()
+
+
+class SumideroBinario:
+    # Registros de tamaño fijo (dtype REGISTRO) acumulados en columnas tipadas y
+    # escritos de a bloques
+    def __init__(self, ruta, tamano_bloque=65536):
+        self.archivo = open(ruta, "wb")
+        self.tamano_bloque = tamano_bloque
+        self._nuevos_bloques()
+
+    def _nuevos_bloques(self):
+        self.tiempos = array('d')
+        self.codigos = array('h')
+        self.entidades = array('q')
+        self.valores = array('d')
+
+    def evento(self, tiempo, codigo, entidad, valor):
+        self.tiempos.append(tiempo)
+        self.codigos.append(codigo)
+        self.entidades.append(entidad)
+        self.valores.append(valor)
+        if len(self.tiempos) >= self.tamano_bloque:
+            self.vaciar()
+
+    def mensaje(self, texto):
+        pass
+
+    def vaciar(self):
+        bloque = np.empty(len(self.tiempos), dtype=REGISTRO)
+        bloque["tiempo"] = self.tiempos
+        bloque["codigo"] = self.codigos
+        bloque["entidad"] = self.entidades
+        bloque["valor"] = self.valores
+        bloque.tofile(self.archivo)
+        self._nuevos_bloques()
+
+    def cerrar(self):
+        self.vaciar()
+        self.archivo.close()
@@ -0,0 +1,87 @@
+import customtkinter as ctk
+
+
+class VistaPaginada(ctk.CTkFrame):
+    # Caja de texto que recibe los resultados por bloques con after(), para que la
+    # ventana siga respondiendo, y que se detiene en un tope de líneas hasta que
+    # el usuario pide "Cargar más"
+    def __init__(self, master, lineas_por_bloque=200, tope=5000, **kwargs):
+        super().__init__(master, **kwargs)
+        self.lineas_por_bloque = lineas_por_bloque
+        self.tope = tope
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+
+        self.txt_resultados = ctk.CTkTextbox(self, width=700, height=300)
+        self.txt_resultados.grid(row=0, column=0, columnspan=2, sticky="nsew")
+        self.txt_resultados.configure(state="disabled")
+
+        self.lbl_estado = ctk.CTkLabel(self, text="", anchor="w")
+        self.lbl_estado.grid(row=1, column=0, padx=5, pady=5, sticky="w")
+
+        self.btn_cargar_mas = ctk.CTkButton(self, text="Cargar más", command=self.cargar_mas, state="disabled")
+        self.btn_cargar_mas.grid(row=1, column=1, padx=5, pady=5, sticky="e")
+
+        self._fuente = None
+        self._total = 0
+        self._mostradas = 0
+        self._limite = 0
+        self._pendiente = None
+
+    def limpiar(self):
+        if self._pendiente is not None:
+            self.after_cancel(self._pendiente)
+            self._pendiente = None
+        self._fuente = None
+        self._total = self._mostradas = self._limite = 0
+        self.txt_resultados.configure(state="normal")
+        self.txt_resultados.delete("1.0", ctk.END)
+        self.txt_resultados.configure(state="disabled")
+        self.lbl_estado.configure(text="")
+        self.btn_cargar_mas.configure(state="disabled")
+
+    def mostrar_texto(self, texto):
+        # Texto ya armado: se pagina por líneas igual que con mostrar
+        lineas = texto.splitlines()
+        self.mostrar(len(lineas), lambda inicio, cantidad: "\n".join(lineas[inicio:inicio + cantidad]))
+
+    def mostrar(self, total_lineas, obtener_texto):
+        # obtener_texto(inicio, cantidad) devuelve esas líneas ya formateadas
+        self.limpiar()
+        self._fuente = obtener_texto
+        self._total = total_lineas
+        self._limite = min(self.tope, total_lineas)
+        self._pendiente = self.after(1, self._insertar_bloque)
+
+    def cargar_mas(self):
+        self.btn_cargar_mas.configure(state="disabled")
+        self._limite = min(self._limite + self.tope, self._total)
+        if self._pendiente is None:
+            self._pendiente = self.after(1, self._insertar_bloque)
+
+    def _insertar_bloque(self):
+        self._pendiente = None
+        if self._fuente is None:
+            return
+        n = min(self.lineas_por_bloque, self._limite - self._mostradas)
+        if n > 0:
+            self.txt_resultados.configure(state="normal")
+            self.txt_resultados.insert(ctk.END, self._fuente(self._mostradas, n) + "\n")
+            self.txt_resultados.configure(state="disabled")
+            self._mostradas += n
+        self.lbl_estado.configure(text=f"Mostrando {self._mostradas} de {self._total} líneas")
+        if self._mostradas < self._limite:
+            self._pendiente = self.after(1, self._insertar_bloque)
+        elif self._mostradas < self._total:
+            self.btn_cargar_mas.configure(state="normal")
+
+
+def ejecutar_independiente(clase_ventana):
+    # Las ventanas de simulación son CTkToplevel para poder abrirse desde main.py;
+    # ejecutadas como programa propio cuelgan de una raíz oculta que se cierra con ellas
+    raiz = ctk.CTk()
+    raiz.withdraw()
+    ventana = clase_ventana(raiz)
+    ventana.protocol("WM_DELETE_WINDOW", raiz.destroy)
+    raiz.mainloop()
@@ -2,6 +2,7 @@ import numpy as np
 from scipy.integrate import odeint
 import matplotlib.pyplot as plt
 import customtkinter as ctk
+from Componentes import ejecutar_independiente
 
 class ReaccionQuimica:
     def __init__(self, k, A0):
@@ -29,11 +30,11 @@ class ReaccionQuimica:
         plt.title('Descomposición de un Reactivo de Primer Orden')
         plt.grid(True)
         plt.legend()
-        plt.show()
+        plt.show(block=False)
 
-class InterfazReaccionQuimica(ctk.CTk):
-    def __init__(self):
-        super().__init__()
+class InterfazReaccionQuimica(ctk.CTkToplevel):
+    def __init__(self, master=None):
+        super().__init__(master)
 
         self.title("Simulación de Reacción Química")
         self.geometry("400x300")
@@ -102,5 +103,4 @@ class InterfazReaccionQuimica(ctk.CTk):
         reaccion.graficar(tiempo, solucion)
 
 if __name__ == "__main__":
-    app = InterfazReaccionQuimica()
-    app.mainloop()
\ No newline at end of file
+    ejecutar_independiente(InterfazReaccionQuimica)
\ No newline at end of file
@@ -2,6 +2,7 @@ import numpy as np
 from scipy.integrate import odeint
 import matplotlib.pyplot as plt
 import customtkinter as ctk
+from Componentes import ejecutar_independiente
 
 class SimulacionTermica:
     def __init__(self, Q_gen, k, T_cool, C, T0):
@@ -27,11 +28,11 @@ class SimulacionTermica:
         plt.axhline(self.T_cool, color='red', linestyle='--', label='Temperatura del Sistema de Enfriamiento')
         plt.grid(True)
         plt.legend()
-        plt.show()
+        plt.show(block=False)
 
-class InterfazSimulacionTermica(ctk.CTk):
-    def __init__(self):
-        super().__init__()
+class InterfazSimulacionTermica(ctk.CTkToplevel):
+    def __init__(self, master=None):
+        super().__init__(master)
 
         self.title("Simulación Térmica")
         self.geometry("700x400")
@@ -120,5 +121,4 @@ class InterfazSimulacionTermica(ctk.CTk):
         simulacion.graficar(tiempo, solucion.flatten())
 
 if __name__ == "__main__":
-    app = InterfazSimulacionTermica()
-    app.mainloop()
\ No newline at end of file
+    ejecutar_independiente(InterfazSimulacionTermica)
\ No newline at end of file
@@ -1,78 +1,330 @@
-import random
 import simpy
 import math
+import heapq
+import csv
+import threading
+from array import array
+import numpy as np
 import customtkinter as ctk
+from Estadisticas import ColectorRecurso
+from Recursos import RecursoMonitoreado
+from Aleatorios import FlujosAleatorios
+from Componentes import VistaPaginada, ejecutar_independiente
+from PuntosControl import guardar_estado, cargar_estado
+
+# Clientes que el motor vectorizado procesa por bloque (acota la memoria usada)
+BLOQUE_VECTORIZADO = 1 << 16
+
+class TrazaPeluqueria:
+    # Traza de eventos en columnas tipadas; el texto sólo se genera al pedirlo
+    LLEGADA, PASA, CORTE, SALIDA = range(4)
+
+    def __init__(self):
+        self.tipo = array('b')
+        self.cliente = array('l')
+        self.tiempo = array('d')
+        self.duracion = array('d')  # espera en PASA, tiempo de corte en CORTE
+
+    def registrar(self, tipo, cliente, tiempo, duracion=0.0):
+        self.tipo.append(tipo)
+        self.cliente.append(cliente)
+        self.tiempo.append(tiempo)
+        self.duracion.append(duracion)
+
+    def __len__(self):
+        return len(self.tipo)
+
+    def linea(self, i):
+        tipo, cliente = self.tipo[i], self.cliente[i]
+        if tipo == self.LLEGADA:
+            return f"--> cliente {cliente} llegó a la peluquería en el minuto {self.tiempo[i]:.2f}"
+        if tipo == self.PASA:
+            return f"cliente {cliente} Pasa y espera en la peluquería en el minuto {self.tiempo[i]:.2f} habiendo esperado {self.duracion[i]:.2f}"
+        if tipo == self.CORTE:
+            return f"Corte listo a cliente {cliente} en {self.duracion[i]:.2f} minutos"
+        return f"<--cliente {cliente} deja la peluquería en minuto {self.tiempo[i]:.2f}"
+
+    def texto(self, inicio=0, cantidad=None):
+        fin = len(self) if cantidad is None else min(len(self), inicio + cantidad)
+        return "\n".join(self.linea(i) for i in range(inicio, fin))
+
+    def paginas(self, tamano=1000):
+        for inicio in range(0, len(self), tamano):
+            yield self.texto(inicio, tamano)
 
 class SimulacionPeluqueria:
-    def __init__(self, semilla, num_peluqueros, tiempo_corte_min, tiempo_corte_max, t_llegadas, tot_clientes):
+    def __init__(self, semilla, num_peluqueros, tiempo_corte_min, tiempo_corte_max, t_llegadas, tot_clientes, vectorizado=False, traza=True, monitoreo=False, flujos=None):
         self.semilla = semilla
         self.num_peluqueros = num_peluqueros
         self.tiempo_corte_min = tiempo_corte_min
         self.tiempo_corte_max = tiempo_corte_max
         self.t_llegadas = t_llegadas
         self.tot_clientes = tot_clientes
+        self.vectorizado = vectorizado  # usar el motor NumPy en lugar de simpy
         self.te = 0.0  # tiempo de espera total
         self.dt = 0.0  # duración del servicio
         self.fin = 0.0  # minuto en que finaliza
         self.env = simpy.Environment()
-        self.personal = simpy.Resource(self.env, num_peluqueros)
-        random.seed(self.semilla)
-        self.resultados = []
+        # Con monitoreo el recurso guarda cada cambio de ocupados y cola (distribuciones exactas)
+        self.monitoreo = monitoreo and not vectorizado
+        self.personal = (RecursoMonitoreado if self.monitoreo else simpy.Resource)(self.env, num_peluqueros)
+        self.estadisticas = ColectorRecurso(self.env, self.personal)
+        # Flujos propios: llegadas y cortes no dependen del módulo random global.
+        # Se pueden pasar otros (antitéticos, estratificados) para reducir varianza
+        self.flujos = flujos if flujos is not None else FlujosAleatorios(self.semilla)
+        self.ultima_llegada = 0.0
+        self.vector = None  # estado del motor vectorizado entre bloques (libres, reloj, restantes)
+        # Sin traza sólo se acumulan los indicadores (corridas puramente estadísticas)
+        self.traza = TrazaPeluqueria() if traza else None
+        self.indicadores = None
+        self._registros = None  # registros por número de cliente en modo streaming
 
     def cortar(self, cliente):
-        R = random.random()
+        R = self.flujos["servicio"].uniforme()
         tiempo = self.tiempo_corte_max - self.tiempo_corte_min
         tiempo_corte = self.tiempo_corte_min + (tiempo * R)  # dist Uniforme
         yield self.env.timeout(tiempo_corte)
-        self.resultados.append(f"Corte listo a {cliente} en {tiempo_corte:.2f} minutos")
+        if self.traza is not None:
+            self.traza.registrar(TrazaPeluqueria.CORTE, cliente, self.env.now, tiempo_corte)
         self.dt += tiempo_corte
+        return tiempo_corte
 
-    def cliente(self, name):
+    def cliente(self, numero):
+        traza = self.traza
         llega = self.env.now
-        self.resultados.append(f"--> {name} llegó a la peluquería en el minuto {llega:.2f}")
+        if traza is not None:
+            traza.registrar(TrazaPeluqueria.LLEGADA, numero, llega)
+        estadisticas = self.estadisticas
         with self.personal.request() as request:
+            estadisticas.observar()
             yield request
+            estadisticas.observar()
             pasa = self.env.now
             espera = pasa - llega
             self.te += espera
-            self.resultados.append(f"{name} Pasa y espera en la peluquería en el minuto {pasa:.2f} habiendo esperado {espera:.2f}")
-            yield self.env.process(self.cortar(name))
+            estadisticas.espera(espera)
+            if traza is not None:
+                traza.registrar(TrazaPeluqueria.PASA, numero, pasa, espera)
+            tiempo_corte = yield self.env.process(self.cortar(numero))
             deja = self.env.now
-            self.resultados.append(f"<--{name} deja la peluquería en minuto {deja:.2f}")
+            if traza is not None:
+                traza.registrar(TrazaPeluqueria.SALIDA, numero, deja)
+            if self._registros is not None:
+                self._registros[numero] = ("cliente", numero, llega, pasa, tiempo_corte, deja)
             self.fin = deja
+        estadisticas.observar()
 
     def principal(self):
+        llegadas = self.flujos["llegadas"]
         for i in range(self.tot_clientes):
-            R = random.random()
-            llegada = -self.t_llegadas * math.log(R)
+            llegada = llegadas.exponencial(self.t_llegadas)
             yield self.env.timeout(llegada)
-            self.env.process(self.cliente(f'cliente {i+1}'))
+            self.env.process(self.cliente(i + 1))
+        self.ultima_llegada = self.env.now
 
-    def ejecutar_simulacion(self):
-        self.env.process(self.principal())
-        self.env.run()
+    def bloques_vectorizados(self):
+        # Mismo modelo G/G/c sin procesos simpy: las llegadas y los cortes se generan
+        # por bloques con NumPy y la espera se obtiene asignando cada cliente, en orden
+        # de llegada, al peluquero que se libera primero (recursión de Lindley).
+        # Devuelve por bloque (llegadas, esperas, cortes)
+        flujo_llegadas = self.flujos["llegadas"]
+        flujo_cortes = self.flujos["servicio"]
+        tiempo = self.tiempo_corte_max - self.tiempo_corte_min
+        # El estado vive en self.vector para poder retomarlo desde un punto de control
+        if self.vector is None:
+            # libres: heap con el minuto en que se libera cada peluquero
+            self.vector = {"libres": [0.0] * self.num_peluqueros, "reloj": 0.0, "restantes": self.tot_clientes}
+        estado = self.vector
+        libres = estado["libres"]
 
-        lpc = self.te / self.fin
-        tep = self.te / self.tot_clientes
-        upi = (self.dt / self.fin) / self.num_peluqueros
+        while estado["restantes"] > 0:
+            n = min(BLOQUE_VECTORIZADO, estado["restantes"])
+            estado["restantes"] -= n
+            llegadas = estado["reloj"] + np.cumsum(flujo_llegadas.exponenciales(self.t_llegadas, n))
+            cortes = self.tiempo_corte_min + tiempo * flujo_cortes.uniformes(n)
+            estado["reloj"] = self.ultima_llegada = float(llegadas[-1])
 
-        self.resultados.append("\nIndicadores obtenidos")
-        self.resultados.append(f"Longitud promedio de la cola: {lpc:.2f}")
-        self.resultados.append(f"Tiempo de espera promedio: {tep:.2f}")
-        self.resultados.append(f"Uso promedio de la instalación: {upi:.2f}")
+            if self.num_peluqueros == 1:
+                # Con un servidor la recursión se resuelve con acumulados:
+                # salida_i = S_i + max(libre, max_{k<=i}(llegada_k - S_{k-1}))
+                acumulado = np.cumsum(cortes)
+                salidas = acumulado + np.maximum(libres[0], np.maximum.accumulate(llegadas - (acumulado - cortes)))
+                esperas = np.maximum(salidas - cortes - llegadas, 0.0)
+                libres[0] = float(salidas[-1])
+            else:
+                esperas = np.empty(n)
+                for i, (llega, corte) in enumerate(zip(llegadas.tolist(), cortes.tolist())):
+                    libre = libres[0]
+                    pasa = llega if llega > libre else libre
+                    heapq.heapreplace(libres, pasa + corte)
+                    esperas[i] = pasa - llega
 
-        return "\n".join(self.resultados)
+            self.te += float(esperas.sum())
+            self.dt += float(cortes.sum())
+            self.estadisticas.agregar_esperas(esperas)
+            self.fin = max(libres)
+            yield llegadas, esperas, cortes
 
-class InterfazSimulacionPeluqueria(ctk.CTk):
-    def __init__(self):
-        super().__init__()
+    def ejecutar_vectorizado(self, punto_control=None, cada=1000000):
+        # Con punto_control (ruta) el estado se guarda cada `cada` clientes, al
+        # terminar un bloque; ver reanudar
+        hechos = ultimo = self.tot_clientes - (self.vector["restantes"] if self.vector else self.tot_clientes)
+        for llegadas, _, _ in self.bloques_vectorizados():
+            hechos += len(llegadas)
+            if punto_control is not None and hechos - ultimo >= cada:
+                guardar_estado(punto_control, self.estado_vectorizado())
+                ultimo = hechos
+
+    def estado_vectorizado(self):
+        # Todo lo que el motor vectorizado necesita para seguir: flujos (con su
+        # generador y lo que queda del bloque), heap de peluqueros y acumulados
+        return {
+            "parametros": (self.semilla, self.num_peluqueros, self.tiempo_corte_min, self.tiempo_corte_max,
+                           self.t_llegadas, self.tot_clientes),
+            "flujos": self.flujos,
+            "vector": self.vector,
+            "te": self.te,
+            "dt": self.dt,
+            "fin": self.fin,
+            "ultima_llegada": self.ultima_llegada,
+            "esperas": self.estadisticas.esperas,
+            "cuantiles": self.estadisticas.cuantiles,
+        }
+
+    @classmethod
+    def reanudar(cls, ruta):
+        # Simulación vectorizada lista para seguir con ejecutar_simulacion(); el
+        # resultado es idéntico al de una corrida sin cortes
+        estado = cargar_estado(ruta)
+        simulacion = cls(*estado["parametros"], vectorizado=True, traza=False, flujos=estado["flujos"])
+        simulacion.vector = estado["vector"]
+        simulacion.te, simulacion.dt, simulacion.fin = estado["te"], estado["dt"], estado["fin"]
+        simulacion.ultima_llegada = estado["ultima_llegada"]
+        simulacion.estadisticas.esperas = estado["esperas"]
+        simulacion.estadisticas.cuantiles = estado["cuantiles"]
+        return simulacion
+
+    def calcular_indicadores(self, fin, atendidos, te=None, dt=None):
+        te = self.te if te is None else te
+        dt = self.dt if dt is None else dt
+        lpc = te / fin
+        tep = te / atendidos
+        upi = (dt / fin) / self.num_peluqueros
+        return {"lpc": lpc, "tep": tep, "upi": upi}
+
+    def indicadores_finales(self):
+        indicadores = self.calcular_indicadores(self.fin, self.tot_clientes)
+        resumen = self.estadisticas.resumen(self.fin)
+        if self.vectorizado:
+            # El motor vectorizado no sigue la cola evento a evento: sólo se conservan
+            # las medias, que coinciden con las identidades sum(esperas)/fin y sum(cortes)/fin
+            resumen["cola_media"] = indicadores["lpc"]
+            resumen["ocupados_media"] = self.dt / self.fin
+            del resumen["cola_varianza"], resumen["cola_max"]
+        indicadores.update(resumen)
+        if self.monitoreo:
+            indicadores["recurso"] = self.personal.resumen(self.fin)
+        return indicadores
+
+    def ejecutar_simulacion(self, sumidero=None, intervalo=10000, punto_control=None, cada=1000000):
+        # Con sumidero, cada registro de iterar_simulacion se le entrega al vuelo.
+        # Los puntos de control sólo existen en el motor vectorizado: los procesos
+        # de simpy no se pueden guardar
+        if punto_control is not None and not self.vectorizado:
+            raise ValueError("Los puntos de control requieren el motor vectorizado")
+        if sumidero is not None:
+            for registro in self.iterar_simulacion(intervalo):
+                sumidero(registro)
+            return self.indicadores
+
+        if self.vectorizado:
+            self.ejecutar_vectorizado(punto_control, cada)
+        else:
+            self.env.process(self.principal())
+            self.env.run()
+
+        self.indicadores = self.indicadores_finales()
+        return self.indicadores
+
+    def iterar_simulacion(self, intervalo=10000):
+        # Modo streaming: produce ("cliente", numero, llegada, pasa, corte, salida) por
+        # cliente atendido y ("indicadores", atendidos, dict) cada `intervalo` clientes.
+        # Los dos motores entregan los clientes en orden de llegada: con simpy, el que
+        # sale antes que alguien llegado antes espera a que éste salga (con FIFO son a
+        # lo sumo num_peluqueros - 1). Con traza=False la memoria no crece con tot_clientes
+        atendidos = 0
+        if self.vectorizado:
+            # El motor avanza por bloques; los parciales se acumulan cliente a cliente
+            te = dt = fin = 0.0
+            for llegadas, esperas, cortes in self.bloques_vectorizados():
+                pasan = llegadas + esperas
+                for llega, pasa, corte, deja in zip(llegadas.tolist(), pasan.tolist(), cortes.tolist(), (pasan + cortes).tolist()):
+                    atendidos += 1
+                    te += pasa - llega
+                    dt += corte
+                    fin = deja if deja > fin else fin
+                    yield ("cliente", atendidos, llega, pasa, corte, deja)
+                    if atendidos % intervalo == 0:
+                        yield ("indicadores", atendidos, self.calcular_indicadores(fin, atendidos, te, dt))
+        else:
+            terminados = self._registros = {}
+            env = self.env
+            env.process(self.principal())
+            while env.peek() != simpy.core.Infinity:
+                env.step()
+                while atendidos + 1 in terminados:
+                    atendidos += 1
+                    yield terminados.pop(atendidos)
+                    if atendidos % intervalo == 0:
+                        yield ("indicadores", atendidos, self.calcular_indicadores(env.now, atendidos))
+            self._registros = None
+
+        self.indicadores = self.indicadores_finales()
+        yield ("indicadores", atendidos, self.indicadores)
+
+    def guardar_csv(self, ruta, intervalo=10000):
+        # Vuelca los registros por cliente a disco a medida que avanza la simulación,
+        # una fila por cliente en orden de llegada con cualquiera de los dos motores
+        with open(ruta, "w", newline="", encoding="utf-8") as archivo:
+            escritor = csv.writer(archivo)
+            escritor.writerow(["cliente", "llegada", "pasa", "corte", "salida"])
+            for registro in self.iterar_simulacion(intervalo):
+                if registro[0] == "cliente":
+                    escritor.writerow(registro[1:])
+        return self.indicadores
+
+    def texto_indicadores(self):
+        return "\n".join([
+            "\nIndicadores obtenidos",
+            f"Longitud promedio de la cola: {self.indicadores['lpc']:.2f}",
+            f"Tiempo de espera promedio: {self.indicadores['tep']:.2f}",
+            f"Uso promedio de la instalación: {self.indicadores['upi']:.2f}",
+            f"Desviación estándar de la espera: {math.sqrt(self.indicadores['espera_varianza']):.2f}",
+            f"Espera p95 / p99: {self.indicadores['espera_p95']:.2f} / {self.indicadores['espera_p99']:.2f}",
+        ])
+
+    def paginas_resultados(self, tamano=1000):
+        # Detalle por cliente (si hubo traza) seguido de los indicadores, página a página
+        if self.traza is not None:
+            yield from self.traza.paginas(tamano)
+        yield self.texto_indicadores()
+
+class InterfazSimulacionPeluqueria(ctk.CTkToplevel):
+    def __init__(self, master=None):
+        super().__init__(master)
 
         self.title("Simulación Peluquería")
-        self.geometry("800x600")
-        self.minsize(800, 600)
+        self.geometry("800x700")
+        self.minsize(800, 700)
 
         self.grid_columnconfigure(0, weight=1)
-        self.grid_rowconfigure(7, weight=1)
+        self.grid_rowconfigure(9, weight=1)
+
+        self.hilo = None
+        self.simulacion = None
+        self.cancelar = threading.Event()
+        self.progreso = 0.0
+        self.error = None
 
         self.crear_widgets()
 
@@ -92,12 +344,24 @@ class InterfazSimulacionPeluqueria(ctk.CTk):
             entry.grid(row=i, column=1, padx=10, pady=5, sticky="w")
             setattr(self, f"entry_{attr}", entry)
 
+        self.chk_vectorizado = ctk.CTkCheckBox(self, text="Motor vectorizado (sin detalle por cliente)")
+        self.chk_vectorizado.grid(row=6, column=0, padx=10, pady=20, sticky="e")
+
         self.btn_simular = ctk.CTkButton(self, text="Generar Simulación", command=self.ejecutar_simulacion)
-        self.btn_simular.grid(row=6, column=0, columnspan=2, pady=20)
+        self.btn_simular.grid(row=6, column=1, padx=10, pady=20, sticky="w")
 
-        self.txt_resultados = ctk.CTkTextbox(self, width=700, height=300)
-        self.txt_resultados.grid(row=7, column=0, columnspan=2, padx=10, pady=10, sticky="nsew")
-        self.txt_resultados.configure(state="disabled")
+        self.barra_progreso = ctk.CTkProgressBar(self)
+        self.barra_progreso.grid(row=7, column=0, padx=10, pady=5, sticky="ew")
+        self.barra_progreso.set(0)
+
+        self.btn_cancelar = ctk.CTkButton(self, text="Cancelar", command=self.cancelar_simulacion, state="disabled")
+        self.btn_cancelar.grid(row=7, column=1, padx=10, pady=5, sticky="w")
+
+        self.lbl_indicadores = ctk.CTkLabel(self, text="", justify="left", anchor="w")
+        self.lbl_indicadores.grid(row=8, column=0, columnspan=2, padx=10, pady=5, sticky="w")
+
+        self.vista_resultados = VistaPaginada(self)
+        self.vista_resultados.grid(row=9, column=0, columnspan=2, padx=10, pady=10, sticky="nsew")
 
     def validar_entradas(self):
         try:
@@ -117,21 +381,70 @@ class InterfazSimulacionPeluqueria(ctk.CTk):
             return None
 
     def mostrar_error(self, mensaje):
-        self.txt_resultados.configure(state="normal")
-        self.txt_resultados.delete("1.0", ctk.END)
-        self.txt_resultados.insert(ctk.END, f"Error: {mensaje}")
-        self.txt_resultados.configure(state="disabled")
+        self.lbl_indicadores.configure(text="")
+        self.vista_resultados.mostrar_texto(f"Error: {mensaje}")
 
     def ejecutar_simulacion(self):
+        if self.hilo is not None and self.hilo.is_alive():
+            return
         parametros = self.validar_entradas()
         if parametros:
-            simulacion = SimulacionPeluqueria(*parametros)
-            resultados = simulacion.ejecutar_simulacion()
-            self.txt_resultados.configure(state="normal")
-            self.txt_resultados.delete("1.0", ctk.END)
-            self.txt_resultados.insert(ctk.END, resultados)
-            self.txt_resultados.configure(state="disabled")
+            vectorizado = bool(self.chk_vectorizado.get())
+            self.simulacion = SimulacionPeluqueria(*parametros, vectorizado=vectorizado, traza=not vectorizado)
+            self.cancelar.clear()
+            self.progreso = 0.0
+            self.error = None
+            self.barra_progreso.set(0)
+            self.lbl_indicadores.configure(text="Simulando...")
+            self.vista_resultados.limpiar()
+            self.btn_simular.configure(state="disabled")
+            self.btn_cancelar.configure(state="normal")
+
+            # La simulación corre en un hilo aparte; la ventana sólo consulta su avance
+            self.hilo = threading.Thread(target=self.trabajo, args=(self.simulacion,), daemon=True)
+            self.hilo.start()
+            self.after(16, self.vigilar)
+
+    def trabajo(self, simulacion):
+        try:
+            total = simulacion.tot_clientes
+            if simulacion.vectorizado:
+                hechos = 0
+                for llegadas, _, _ in simulacion.bloques_vectorizados():
+                    if self.cancelar.is_set():
+                        return
+                    hechos += len(llegadas)
+                    self.progreso = hechos / total
+                simulacion.indicadores = simulacion.indicadores_finales()
+            else:
+                for registro in simulacion.iterar_simulacion(max(1, total // 100)):
+                    if self.cancelar.is_set():
+                        return
+                    if registro[0] == "indicadores":
+                        self.progreso = registro[1] / total
+        except Exception as e:
+            self.error = e
+
+    def cancelar_simulacion(self):
+        self.cancelar.set()
+
+    def vigilar(self):
+        self.barra_progreso.set(self.progreso)
+        if self.hilo.is_alive():
+            self.after(16, self.vigilar)
+            return
+
+        self.btn_simular.configure(state="normal")
+        self.btn_cancelar.configure(state="disabled")
+        simulacion = self.simulacion
+        if self.error is not None:
+            self.mostrar_error(str(self.error))
+        elif self.cancelar.is_set():
+            self.lbl_indicadores.configure(text="Simulación cancelada")
+        else:
+            self.lbl_indicadores.configure(text=simulacion.texto_indicadores().strip())
+            if simulacion.traza is not None:
+                self.vista_resultados.mostrar(len(simulacion.traza), simulacion.traza.texto)
 
 if __name__ == "__main__":
-    app = InterfazSimulacionPeluqueria()
-    app.mainloop()
\ No newline at end of file
+    ejecutar_independiente(InterfazSimulacionPeluqueria)
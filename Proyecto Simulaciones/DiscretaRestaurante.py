@@ -1,8 +1,15 @@
 import os
 import sys
-import random
-import datetime
+import math
+import copy
+import functools
+from array import array
+import numpy as np
 import simpy
+from Aleatorios import FlujosAleatorios
+from Replicas import derivar_semillas, resumir, ejecutar_en_paralelo
+from Bitacora import Bitacora, SumideroTexto, SIN_BITACORA, EVENTOS
+from Estadisticas import medias_por_lotes
 
 def clear():
     os.system(['clear', 'cls'][os.name == 'nt'])
@@ -45,258 +52,739 @@ def get_range_input(prompt):
         except ValueError:
             print("Por favor, ingrese dos números enteros separados por coma")
 
-# Obtener inputs del usuario
-HOUR_OPEN = get_int_input("Ingrese Hora de Apertura (Entre 0 y 23): ", 0, 23)
-HOUR_CLOSE = get_int_input("Ingrese Hora de Cierre (Entre 0 y 23): ", HOUR_OPEN + 1, 23)
-PEAK_START = get_int_input("Ingrese Inicio de Hora Pico (Entre 0 y 23): ", 0, 23)
-PEAK_END = get_int_input("Ingrese Fin de Hora Pico Entre (0 y 23): ", PEAK_START + 1, 23)
-NUM_COUNTERS = get_int_input("Ingrese numero de operadores (2 o 3): ", 1)
-TIME_COUNTER_A = get_int_input("Ingrese Tiempo de Mostrador A (min): ", 1)
-TIME_COUNTER_B = get_int_input("Ingrese Tiempo de Mostrador B (min): ", 1)
-TIME_COUNTER_C = get_int_input("Ingrese Tiempo de Mostrador C (min): ", 1)
-CUSTOMER_RANGE_NORM = get_range_input("Ingrese Rango de Clientes en Horario Normal (dos enteros separados por coma, min,max): ")
-CUSTOMER_RANGE_PEAK = get_range_input("Ingrese Rango de Clientes en Horario Pico (dos enteros separados por coma, min,max): ")
-RANDOM_SEED = get_int_input("Ingrese la semilla aleatoria (entero): ")
-
-# Configuración de la simulación
-START = HOUR_OPEN * 60
-SIM_TIME = HOUR_CLOSE * 60
-PEAK_TIME = 60 * (PEAK_END - PEAK_START)
-
-# Variables globales
-STATE = 0
-TEMP = 0
-SUM_ALL = 0.00
-CALC = [0] * 500
-
-# Clases y funciones de la simulación (sin cambios)
-class waitingLane(object):
-    def __init__(self, env):
-        self.env = env
-        self.lane = simpy.Resource(env, 3)
-
-    def serve(self, cust):
-        yield self.env.timeout(0)
-        print("[w] (%s) %s entered the area" % (toc(env.now), cust))
-
-class counterFirst(object):
-    def __init__(self, env):
-        self.env = env
-        self.employee = simpy.Resource(env, 1)
-
-    def serve(self, cust):
-        yield self.env.timeout(random.randint(TIME_COUNTER_A - 1, TIME_COUNTER_A + 1))
-        print("[?] (%s) %s ordered the menu" % (toc(env.now), cust))
-
-class counterSecond(object):
-    def __init__(self, env):
-        self.env = env
-        self.employee = simpy.Resource(env, 1)
-
-    def serve(self, cust):
-        yield self.env.timeout(random.randint(TIME_COUNTER_B - 1, TIME_COUNTER_B + 1))
-        print("[$] (%s) %s paid the order" % (toc(env.now), cust))
-
-class counterFirstSecond(object):
-    def __init__(self, env):
-        self.env = env
-        self.employee = simpy.Resource(env, 1)
-
-    def serve(self, cust):
-        yield self.env.timeout(random.randint(TIME_COUNTER_A - 1, TIME_COUNTER_A + 1))
-        print("[?] (%s) %s ordered the menu" % (toc(env.now), cust))
-        yield self.env.timeout(random.randint(TIME_COUNTER_B - 1, TIME_COUNTER_B + 1))
-        print("[$] (%s) %s paid the order" % (toc(env.now), cust))
-
-class counterThird(object):
-    def __init__(self, env):
-        self.env = env
-        self.employee = simpy.Resource(env, 1)
-
-    def serve(self, cust):
-        yield self.env.timeout(random.randint(TIME_COUNTER_C - 1, TIME_COUNTER_C + 1))
-        print("[#] (%s) %s took the order" % (toc(env.now), cust))
 
-def customer2A(env, name, wl, ce12, ce3):
-
-    with wl.lane.request() as request:
-
-        if (env.now >= SIM_TIME):
-            print("[!] Not enough time! %s cancelled" % name)
-            return
-
-        yield request
-        yield env.process(wl.serve(name))
-        print("[w] (%s) %s is in waiting lane" % (toc(env.now), name))
+"""
+Arrival profiles: generators of arrival times in [start, end) produced in
+NumPy blocks, so the model only walks a list of floats
+"""
 
-    # Start the actual drive-thru process
-    print("[v] (%s) %s is in drive-thru counter" % (toc(env.now), name))
 
-    with ce12.employee.request() as request:
+class GapProfile(object):
+    # Piecewise profile of integer gaps between customers, as the original model:
+    # the gap drawn at time t is uniform in ranges[k], where k is the segment of
+    # t (breakpoints in minutes, len(ranges) == len(breakpoints) + 1). It uses the
+    # same uniforms, in the same order, as one flow.entero() per customer
+    def __init__(self, breakpoints, ranges):
+        if len(ranges) != len(breakpoints) + 1:
+            raise ValueError("Se requiere un rango más que cortes")
+        if any(b <= a for a, b in zip(breakpoints, breakpoints[1:])):
+            raise ValueError("Los cortes deben ser crecientes")
+        if any(low < 0 or high < max(low, 1) for low, high in ranges):
+            raise ValueError("Cada rango debe cumplir 0 <= min <= max y max >= 1")
+        self.breakpoints = np.array(breakpoints, dtype=float)
+        self.ranges = [tuple(r) for r in ranges]
+
+    @classmethod
+    def from_peak(cls, peak_start, peak_end, range_norm, range_peak):
+        if peak_end <= peak_start:
+            return cls([], [range_norm])
+        return cls([peak_start * 60, peak_end * 60], [range_norm, range_peak, range_norm])
+
+    def arrivals(self, flow, start, end, block=1024):
+        t = start
+        u = flow.uniformes(block)
+        used = 0
+        while t < end:
+            if used == len(u):
+                u, used = flow.uniformes(block), 0
+            k = int(np.searchsorted(self.breakpoints, t, side="right"))
+            low, high = self.ranges[k]
+            limit = min(self.breakpoints[k], end) if k < len(self.breakpoints) else end
+            times = t + np.cumsum(low + ((high - low + 1) * u[used:]).astype(np.int64))
+            # Gaps drawn before `limit` belong to this segment; the rest of the
+            # uniforms are reused with the next segment's range
+            m = 1 + int(np.searchsorted(times[:-1], limit, side="left"))
+            times = times[:m]
+            used += m
+            t = times[-1]
+            yield times[times < end]
+
+
+class RateProfile(object):
+    # Non-homogeneous Poisson arrivals with a piecewise constant rate (customers
+    # per minute): rates[k] holds from breakpoints[k - 1] to breakpoints[k], the
+    # first and last ones without limit. Unit-rate epochs are mapped through the
+    # inverse of the cumulative rate, precomputed at the breakpoints
+    def __init__(self, breakpoints, rates):
+        if len(rates) != len(breakpoints) + 1:
+            raise ValueError("Se requiere una tasa más que cortes")
+        if any(r < 0 for r in rates):
+            raise ValueError("Las tasas no pueden ser negativas")
+        if any(b <= a for a, b in zip(breakpoints, breakpoints[1:])):
+            raise ValueError("Los cortes deben ser crecientes")
+        self.breakpoints = np.array(breakpoints, dtype=float)
+        self.rates = np.array(rates, dtype=float)
+        # Segment k is anchored at its left breakpoint (the first one at the first
+        # breakpoint) where the cumulative rate is cumulative[k]
+        self.anchors = np.concatenate([self.breakpoints[:1] if len(breakpoints) else [0.0], self.breakpoints])
+        self.cumulative = np.zeros(len(rates))
+        self.cumulative[2:] = np.cumsum(self.rates[1:-1] * np.diff(self.breakpoints))
+
+    def cumulative_rate(self, t):
+        k = np.searchsorted(self.breakpoints, t, side="right")
+        return self.cumulative[k] + self.rates[k] * (t - self.anchors[k])
+
+    def inverse(self, e):
+        k = np.searchsorted(self.cumulative[1:], e, side="right")
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = self.anchors[k] + (e - self.cumulative[k]) / self.rates[k]
+        return np.where(self.rates[k] > 0, t, np.inf)
+
+    @classmethod
+    def from_peak(cls, peak_start, peak_end, range_norm, range_peak):
+        # Same mean gaps as the integer ranges
+        rate_norm = 2.0 / (range_norm[0] + range_norm[1])
+        if peak_end <= peak_start:
+            return cls([], [rate_norm])
+        return cls([peak_start * 60, peak_end * 60], [rate_norm, 2.0 / (range_peak[0] + range_peak[1]), rate_norm])
+
+    def arrivals(self, flow, start, end, block=1024):
+        e = float(self.cumulative_rate(start))
+        while True:
+            epochs = e + np.cumsum(flow.exponenciales(1.0, block))
+            e = epochs[-1]
+            times = self.inverse(epochs)
+            yield times[times < end]
+            if times[-1] >= end:
+                return
 
-        if (env.now + TIME_COUNTER_A + TIME_COUNTER_B >= SIM_TIME):
-            print("[!] Not enough time! Assumed %s is quickly finished" % name)
-            yield env.timeout(0.5)
-            return
 
-        yield request
+"""
+Scenario parameters for one drive-thru run
+"""
 
-        CALC[int(name[5:])] = env.now
-        yield env.process(ce12.serve(name))
-        print("[?] (%s) %s choose the order" % (toc(env.now), name))
 
-        yield env.process(ce12.serve(name))
-        print("[$] (%s) %s is paying and will take the order" %
-              (toc(env.now), name))
-        env.process(customer2B(env, name, ce12, ce3))
+class DriveThruConfig(object):
+    def __init__(self, hour_open=10, hour_close=14, peak_start=12, peak_end=13, num_counters=3,
+                 time_counter_a=2, time_counter_b=2, time_counter_c=2,
+                 customer_range_norm=(2, 6), customer_range_peak=(1, 3), seed=42, arrival_profile=None):
+        if num_counters not in (2, 3):
+            raise ValueError("num_counters debe ser 2 o 3")
+        # Headless runs may span several days; the console prompts still cap at 23
+        if not 0 <= hour_open < hour_close:
+            raise ValueError("Se requiere 0 <= hour_open < hour_close")
+        self.hour_open = hour_open
+        self.hour_close = hour_close
+        self.peak_start = peak_start
+        self.peak_end = peak_end
+        self.num_counters = num_counters
+        self.time_counter_a = time_counter_a
+        self.time_counter_b = time_counter_b
+        self.time_counter_c = time_counter_c
+        self.customer_range_norm = list(customer_range_norm)
+        self.customer_range_peak = list(customer_range_peak)
+        self.seed = seed
+
+        # Configuración de la simulación
+        self.start = hour_open * 60
+        self.sim_time = hour_close * 60
+        self.peak_time = 60 * (peak_end - peak_start)
+
+        # Gaps come from the peak range between peak_start and peak_end unless a
+        # custom GapProfile/RateProfile is given
+        if arrival_profile is None:
+            arrival_profile = GapProfile.from_peak(peak_start, peak_end, self.customer_range_norm,
+                                                   self.customer_range_peak)
+        self.arrival_profile = arrival_profile
+
+    @classmethod
+    def from_input(cls):
+        # Obtener inputs del usuario
+        hour_open = get_int_input("Ingrese Hora de Apertura (Entre 0 y 23): ", 0, 23)
+        hour_close = get_int_input("Ingrese Hora de Cierre (Entre 0 y 23): ", hour_open + 1, 23)
+        peak_start = get_int_input("Ingrese Inicio de Hora Pico (Entre 0 y 23): ", 0, 23)
+        peak_end = get_int_input("Ingrese Fin de Hora Pico Entre (0 y 23): ", peak_start + 1, 23)
+        num_counters = get_int_input("Ingrese numero de operadores (2 o 3): ", 1)
+        time_counter_a = get_int_input("Ingrese Tiempo de Mostrador A (min): ", 1)
+        time_counter_b = get_int_input("Ingrese Tiempo de Mostrador B (min): ", 1)
+        time_counter_c = get_int_input("Ingrese Tiempo de Mostrador C (min): ", 1)
+        customer_range_norm = get_range_input("Ingrese Rango de Clientes en Horario Normal (dos enteros separados por coma, min,max): ")
+        customer_range_peak = get_range_input("Ingrese Rango de Clientes en Horario Pico (dos enteros separados por coma, min,max): ")
+        seed = get_int_input("Ingrese la semilla aleatoria (entero): ")
+        return cls(hour_open, hour_close, peak_start, peak_end, num_counters, time_counter_a, time_counter_b,
+                   time_counter_c, customer_range_norm, customer_range_peak, seed)
 
 
 """
-(Type 2) Define customer behavior at second counter
+Outcome of one drive-thru run
 """
 
 
-def customer2B(env, name, ce12, ce3):
-
-    with ce3.employee.request() as request:
+class DriveThruResult(object):
+    def __init__(self, num_counters, records):
+        stats = records.statistics(num_counters)
+        self.num_counters = num_counters
+        self.customers = stats["customers"]  # customers that arrived before closing
+        self.served = stats["served"]  # customers that left with their order
+        self.cancelled = stats["cancelled"]
+        self.stages = stats["stages"]
+        self.averageTimeService = stats["averageTimeService"]
+        self.servicePerSecond = 1.00 / (self.averageTimeService * 60) if self.averageTimeService > 0 else 0.0
+        self.servicePerMinute = self.servicePerSecond * 60
+        self.records = records
+
+    def steady_state(self, batches=None, confidence=0.95):
+        # Steady-state averageTimeService from this single run: the warm-up of
+        # the empty restaurant is cut by MSER-5 and the CI comes from about √n
+        # batch means ("fiable" is False when they are too few or correlated)
+        if self.records is None:
+            raise ValueError("Los registros de clientes no se conservaron")
+        departure = self.records.column("departure")
+        done = ~np.isnan(departure)
+        service = departure[done] - self.records.column("start_1")[done]
+        return medias_por_lotes(service, batches, confidence)
 
-        if (env.now + TIME_COUNTER_C >= SIM_TIME):
-            print("[!] Not enough time! Assumed %s is quickly finished" % name)
-            yield env.timeout(0.5)
-            return
 
-        yield request
+"""
+Per-customer timeline stored column-wise in growable typed arrays, indexed by
+the integer customer id (0-based; logs show it as "Cust id+1"). Stage k is the k-th counter of the layout (setup2:
+counterFirstSecond, counterThird; setup3: counterFirst, counterSecond,
+counterThird). Times that never happened stay NaN
+"""
 
-        yield env.process(ce3.serve(name))
-        print("[^] (%s) %s leaves" % (toc(env.now), name))
 
-        global TEMP
-        TEMP = int(name[5:])
-        CALC[int(name[5:])] = env.now - CALC[int(name[5:])]
+class CustomerRecords(object):
+    STAGES = 3
+    FIELDS = ("arrival", "lane_entry", "start_1", "end_1", "start_2", "end_2", "start_3", "end_3", "departure")
+
+    def __init__(self):
+        for field in self.FIELDS:
+            setattr(self, field, array('d'))
+        self.cancelled = array('b')
+
+    def __len__(self):
+        return len(self.arrival)
+
+    def add(self, arrival):
+        # Registers a new customer and returns its id
+        for field in self.FIELDS:
+            getattr(self, field).append(math.nan)
+        self.arrival[-1] = arrival
+        self.cancelled.append(0)
+        return len(self.arrival) - 1
+
+    def column(self, field):
+        # Zero-copy NumPy view of one column
+        return np.frombuffer(getattr(self, field), dtype=np.int8 if field == "cancelled" else float)
+
+    def statistics(self, stages):
+        departure = self.column("departure")
+        done = ~np.isnan(departure)
+        result = {
+            "customers": len(self),
+            "served": int(done.sum()),
+            "cancelled": int(self.column("cancelled").sum()),
+            "stages": [],
+        }
+        # Time from reaching the first counter to leaving the last one
+        service = departure[done] - self.column("start_1")[done]
+        result["averageTimeService"] = float(service.mean()) if len(service) else 0.0
+
+        previous = self.column("lane_entry")
+        for k in range(1, stages + 1):
+            start, end = self.column("start_%d" % k), self.column("end_%d" % k)
+            served = ~np.isnan(end)
+            result["stages"].append({
+                "served": int(served.sum()),
+                "wait": float((start[served] - previous[served]).mean()) if served.any() else 0.0,
+                "service": float((end[served] - start[served]).mean()) if served.any() else 0.0,
+            })
+            previous = end
+        return result
 
 
 """
-(Type 3) Define customer behavior at first counter
+Event codes sent to the log; TEMPLATES turns them back into the console lines
 """
 
+(ENTERED_AREA, ORDERED_MENU, PAID_ORDER, TOOK_ORDER, CANCELLED, IN_WAITING_LANE, AT_COUNTER, QUICK_FINISH,
+ CHOSE_ORDER, PAYING_AND_TAKING, LEAVES, WILL_PAY, PAYING, WILL_TAKE) = range(14)
 
-def customer3A(env, name, wl, ce1, ce2, ce3):
+EVENT_NAMES = ("entered_area", "ordered_menu", "paid_order", "took_order", "cancelled", "in_waiting_lane",
+               "at_counter", "quick_finish", "chose_order", "paying_and_taking", "leaves", "will_pay", "paying",
+               "will_take")
 
-    with wl.lane.request() as request:
 
-        if (env.now >= SIM_TIME):
-            print("[!] Not enough time! %s cancelled" % name)
-            return
+def timed(message):
+    return lambda t, cid, value: message % (toc(t), cid + 1)
 
-        yield request
-        yield env.process(wl.serve(name))
-        print("[w] (%s) %s is in waiting lane" % (toc(env.now), name))
 
-    # Start the actual drive-thru process
-    print("[v] (%s) %s is in drive-thru counter" % (toc(env.now), name))
+def untimed(message):
+    return lambda t, cid, value: message % (cid + 1)
 
-    with ce1.employee.request() as request:
 
-        if (env.now + TIME_COUNTER_A >= SIM_TIME):
-            print("[!] Not enough time! Assumed %s is quickly finished" % name)
-            yield env.timeout(0.5)
+TEMPLATES = {
+    ENTERED_AREA: timed("[w] (%s) Cust %d entered the area"),
+    ORDERED_MENU: timed("[?] (%s) Cust %d ordered the menu"),
+    PAID_ORDER: timed("[$] (%s) Cust %d paid the order"),
+    TOOK_ORDER: timed("[#] (%s) Cust %d took the order"),
+    CANCELLED: untimed("[!] Not enough time! Cust %d cancelled"),
+    IN_WAITING_LANE: timed("[w] (%s) Cust %d is in waiting lane"),
+    AT_COUNTER: timed("[v] (%s) Cust %d is in drive-thru counter"),
+    QUICK_FINISH: untimed("[!] Not enough time! Assumed Cust %d is quickly finished"),
+    CHOSE_ORDER: timed("[?] (%s) Cust %d choose the order"),
+    PAYING_AND_TAKING: timed("[$] (%s) Cust %d is paying and will take the order"),
+    LEAVES: timed("[^] (%s) Cust %d leaves"),
+    WILL_PAY: timed("[2] (%s) Cust %d will pay the order"),
+    PAYING: timed("[$] (%s) Cust %d is paying the order"),
+    WILL_TAKE: timed("[3] (%s) Cust %d will take the order"),
+}
 
-        yield request
 
-        CALC[int(name[5:])] = env.now
-        yield env.process(ce1.serve(name))
-        print("[?] (%s) %s choose the order" % (toc(env.now), name))
-
-        print("[2] (%s) %s will pay the order" % (toc(env.now), name))
-        env.process(customer3B(env, name, ce1, ce2, ce3))
+# Clases y funciones de la simulación
+class waitingLane(object):
+    def __init__(self, env, model):
+        self.env = env
+        self.model = model
+        self.lane = simpy.Resource(env, 3)
 
+    def serve(self, cust):
+        yield self.env.timeout(0)
+        if self.model.log.eventos:
+            self.model.log.evento(self.env.now, ENTERED_AREA, cust)
 
-"""
-(Type 3) Define customer behavior at second counter
-"""
+class counterFirst(object):
+    def __init__(self, env, model):
+        self.env = env
+        self.model = model
+        self.employee = simpy.Resource(env, 1)
 
+    def serve(self, cust):
+        t = self.model.config.time_counter_a
+        yield self.env.timeout(self.model.flows["counter_a"].entero(t - 1, t + 1))
+        if self.model.log.eventos:
+            self.model.log.evento(self.env.now, ORDERED_MENU, cust)
 
-def customer3B(env, name, ce1, ce2, ce3):
+class counterSecond(object):
+    def __init__(self, env, model):
+        self.env = env
+        self.model = model
+        self.employee = simpy.Resource(env, 1)
 
-    with ce2.employee.request() as request:
+    def serve(self, cust):
+        t = self.model.config.time_counter_b
+        yield self.env.timeout(self.model.flows["counter_b"].entero(t - 1, t + 1))
+        if self.model.log.eventos:
+            self.model.log.evento(self.env.now, PAID_ORDER, cust)
 
-        if (env.now + TIME_COUNTER_B >= SIM_TIME):
-            print("[!] Not enough time! Assumed %s is quickly finished" % name)
-            yield env.timeout(0.5)
-            return
+class counterFirstSecond(object):
+    def __init__(self, env, model):
+        self.env = env
+        self.model = model
+        self.employee = simpy.Resource(env, 1)
 
-        yield request
+    def serve(self, cust):
+        ta, tb = self.model.config.time_counter_a, self.model.config.time_counter_b
+        yield self.env.timeout(self.model.flows["counter_a"].entero(ta - 1, ta + 1))
+        if self.model.log.eventos:
+            self.model.log.evento(self.env.now, ORDERED_MENU, cust)
+        yield self.env.timeout(self.model.flows["counter_b"].entero(tb - 1, tb + 1))
+        if self.model.log.eventos:
+            self.model.log.evento(self.env.now, PAID_ORDER, cust)
 
-        yield env.process(ce2.serve(name))
-        print("[$] (%s) %s is paying the order" % (toc(env.now), name))
+class counterThird(object):
+    def __init__(self, env, model):
+        self.env = env
+        self.model = model
+        self.employee = simpy.Resource(env, 1)
 
-        print("[3] (%s) %s will take the order" % (toc(env.now), name))
-        env.process(customer3C(env, name, ce1, ce2, ce3))
+    def serve(self, cust):
+        t = self.model.config.time_counter_c
+        yield self.env.timeout(self.model.flows["counter_c"].entero(t - 1, t + 1))
+        if self.model.log.eventos:
+            self.model.log.evento(self.env.now, TOOK_ORDER, cust)
 
 
 """
-(Type 3) Define customer behavior at third counter
+One drive-thru run: all state lives in the instance, so runs can be repeated
+back to back or in parallel workers
 """
 
 
-def customer3C(env, name, ce1, ce2, ce3):
+class DriveThruModel(object):
+    def __init__(self, config, log=SIN_BITACORA, kernel=False):
+        self.config = config
+        self.log = log
+        self.kernel = kernel  # run_kernel() instead of simpy (no per-customer log events)
+        self.flows = FlujosAleatorios(config.seed)
+        self.records = CustomerRecords()
 
-    with ce3.employee.request() as request:
+    def customer2A(self, env, cid, wl, ce12, ce3):
+        SIM_TIME = self.config.sim_time
+        records = self.records
 
-        if (env.now + TIME_COUNTER_C >= SIM_TIME):
-            print("[!] Not enough time! Assumed %s is quickly finished" % name)
-            yield env.timeout(0.5)
-            return
+        with wl.lane.request() as request:
 
-        yield request
+            if (env.now >= SIM_TIME):
+                if self.log.eventos:
+                    self.log.evento(env.now, CANCELLED, cid)
+                records.cancelled[cid] = 1
+                return
 
-        yield env.process(ce3.serve(name))
-        print("[^] (%s) %s leaves" % (toc(env.now), name))
+            yield request
+            yield env.process(wl.serve(cid))
+            if self.log.eventos:
+                self.log.evento(env.now, IN_WAITING_LANE, cid)
 
-        global TEMP
-        TEMP = int(name[5:])
-        CALC[int(name[5:])] = env.now - CALC[int(name[5:])]
+        # Start the actual drive-thru process
+        records.lane_entry[cid] = env.now
+        if self.log.eventos:
+            self.log.evento(env.now, AT_COUNTER, cid)
 
+        with ce12.employee.request() as request:
 
-"""
-Define detail of 2 counters setup environment
-"""
+            if (env.now + self.config.time_counter_a + self.config.time_counter_b >= SIM_TIME):
+                if self.log.eventos:
+                    self.log.evento(env.now, QUICK_FINISH, cid)
+                records.cancelled[cid] = 1
+                yield env.timeout(0.5)
+                return
 
+            yield request
 
-def setup2(env, cr):
-    # Create all counters
-    wl = waitingLane(env)
-    ce12 = counterFirstSecond(env)
-    ce3 = counterThird(env)
-    i = 0
+            records.start_1[cid] = env.now
+            yield env.process(ce12.serve(cid))
+            if self.log.eventos:
+                self.log.evento(env.now, CHOSE_ORDER, cid)
+
+            yield env.process(ce12.serve(cid))
+            if self.log.eventos:
+                self.log.evento(env.now, PAYING_AND_TAKING, cid)
+            records.end_1[cid] = env.now
+            env.process(self.customer2B(env, cid, ce12, ce3))
+
+    """
+    (Type 2) Define customer behavior at second counter
+    """
 
-    # Create more customers while the simulation is running
-    while True:
-        yield env.timeout(random.randint(*cr))
-        i += 1
-        env.process(customer2A(env, "Cust %d" % i, wl, ce12, ce3))
+    def customer2B(self, env, cid, ce12, ce3):
+        records = self.records
+
+        with ce3.employee.request() as request:
+
+            if (env.now + self.config.time_counter_c >= self.config.sim_time):
+                if self.log.eventos:
+                    self.log.evento(env.now, QUICK_FINISH, cid)
+                records.cancelled[cid] = 1
+                yield env.timeout(0.5)
+                return
+
+            yield request
+
+            records.start_2[cid] = env.now
+            yield env.process(ce3.serve(cid))
+            if self.log.eventos:
+                self.log.evento(env.now, LEAVES, cid)
 
+            records.end_2[cid] = records.departure[cid] = env.now
 
-"""
-Define detail of 3 counters setup environment
-"""
+    """
+    (Type 3) Define customer behavior at first counter
+    """
+
+    def customer3A(self, env, cid, wl, ce1, ce2, ce3):
+        SIM_TIME = self.config.sim_time
+        records = self.records
+
+        with wl.lane.request() as request:
+
+            if (env.now >= SIM_TIME):
+                if self.log.eventos:
+                    self.log.evento(env.now, CANCELLED, cid)
+                records.cancelled[cid] = 1
+                return
+
+            yield request
+            yield env.process(wl.serve(cid))
+            if self.log.eventos:
+                self.log.evento(env.now, IN_WAITING_LANE, cid)
+
+        # Start the actual drive-thru process
+        records.lane_entry[cid] = env.now
+        if self.log.eventos:
+            self.log.evento(env.now, AT_COUNTER, cid)
+
+        with ce1.employee.request() as request:
+
+            if (env.now + self.config.time_counter_a >= SIM_TIME):
+                if self.log.eventos:
+                    self.log.evento(env.now, QUICK_FINISH, cid)
+                yield env.timeout(0.5)
+
+            yield request
+
+            records.start_1[cid] = env.now
+            yield env.process(ce1.serve(cid))
+            if self.log.eventos:
+                self.log.evento(env.now, CHOSE_ORDER, cid)
+                self.log.evento(env.now, WILL_PAY, cid)
+            records.end_1[cid] = env.now
+            env.process(self.customer3B(env, cid, ce1, ce2, ce3))
+
+    """
+    (Type 3) Define customer behavior at second counter
+    """
+
+    def customer3B(self, env, cid, ce1, ce2, ce3):
+        records = self.records
+
+        with ce2.employee.request() as request:
+
+            if (env.now + self.config.time_counter_b >= self.config.sim_time):
+                if self.log.eventos:
+                    self.log.evento(env.now, QUICK_FINISH, cid)
+                records.cancelled[cid] = 1
+                yield env.timeout(0.5)
+                return
+
+            yield request
+
+            records.start_2[cid] = env.now
+            yield env.process(ce2.serve(cid))
+            if self.log.eventos:
+                self.log.evento(env.now, PAYING, cid)
+                self.log.evento(env.now, WILL_TAKE, cid)
+            records.end_2[cid] = env.now
+            env.process(self.customer3C(env, cid, ce1, ce2, ce3))
+
+    """
+    (Type 3) Define customer behavior at third counter
+    """
+
+    def customer3C(self, env, cid, ce1, ce2, ce3):
+        records = self.records
+
+        with ce3.employee.request() as request:
+
+            if (env.now + self.config.time_counter_c >= self.config.sim_time):
+                if self.log.eventos:
+                    self.log.evento(env.now, QUICK_FINISH, cid)
+                records.cancelled[cid] = 1
+                yield env.timeout(0.5)
+                return
+
+            yield request
+
+            records.start_3[cid] = env.now
+            yield env.process(ce3.serve(cid))
+            if self.log.eventos:
+                self.log.evento(env.now, LEAVES, cid)
+
+            records.end_3[cid] = records.departure[cid] = env.now
+
+    """
+    Define detail of 2 counters setup environment
+    """
+
+    def setup2(self, env):
+        # Create all counters
+        wl = waitingLane(env, self)
+        ce12 = counterFirstSecond(env, self)
+        ce3 = counterThird(env, self)
+        arrivals = self.config.arrival_profile.arrivals(self.flows["arrivals"], env.now, self.config.sim_time)
+
+        # Create more customers while the simulation is running
+        for block in arrivals:
+            for t in block.tolist():
+                yield env.timeout(t - env.now)
+                cid = self.records.add(env.now)
+                env.process(self.customer2A(env, cid, wl, ce12, ce3))
+
+    """
+    Define detail of 3 counters setup environment
+    """
+
+    def setup3(self, env):
+        # Create all counters
+        wl = waitingLane(env, self)
+        ce1 = counterFirst(env, self)
+        ce2 = counterSecond(env, self)
+        ce3 = counterThird(env, self)
+        arrivals = self.config.arrival_profile.arrivals(self.flows["arrivals"], env.now, self.config.sim_time)
+
+        # Create more customers while the simulation is running
+        for block in arrivals:
+            for t in block.tolist():
+                yield env.timeout(t - env.now)
+                cid = self.records.add(env.now)
+                env.process(self.customer3A(env, cid, wl, ce1, ce2, ce3))
+
+    def run(self):
+        if self.kernel:
+            return self.run_kernel()
+        config = self.config
+        env = simpy.Environment(initial_time=config.start)
+        if self.log.resumen:
+            self.log.mensaje("Environment created at %d!" % env.now)
+
+        if config.num_counters == 2:
+            env.process(self.setup2(env))
+        else:
+            env.process(self.setup3(env))
+
+        if self.log.resumen:
+            self.log.mensaje("Setup initialized!")
+            self.log.mensaje("Start simulation!")
+        env.run(until=config.sim_time)
+
+        return DriveThruResult(config.num_counters, self.records)
+
+    def run_kernel(self):
+        # Same model without simpy. Every counter is a single FIFO server
+        # released as soon as its customer moves on, so customers keep their
+        # arrival order through the whole line and each counter reduces to a
+        # "free at" time updated customer by customer. Service times are drawn
+        # in blocks from the same streams, in the same order, and nothing that
+        # would happen at or after closing time is recorded, so the records
+        # match run() exactly
+        config = self.config
+        SIM_TIME = config.sim_time
+        ta, tb, tc = config.time_counter_a, config.time_counter_b, config.time_counter_c
+        blocks = list(config.arrival_profile.arrivals(self.flows["arrivals"], config.start, SIM_TIME))
+        arrivals = np.concatenate(blocks).tolist() if blocks else []
+        n = len(arrivals)
+
+        def draws(name, t, count):
+            return iter(self.flows[name].enteros(t - 1, t + 1, count).tolist())
+
+        cancelled = [0] * n
+        if config.num_counters == 2:
+            a, b = draws("counter_a", ta, 2 * n), draws("counter_b", tb, 2 * n)
+            start_1, end_1 = station(arrivals, SIM_TIME, (a, b, a, b), cancelled, cancel_margin=ta + tb)
+            start_2, end_2 = station(end_1, SIM_TIME, (draws("counter_c", tc, n),), cancelled, cancel_margin=tc)
+            stages = ((start_1, end_1), (start_2, end_2))
+        else:
+            start_1, end_1 = station(arrivals, SIM_TIME, (draws("counter_a", ta, n),), cancelled, wait_margin=ta)
+            start_2, end_2 = station(end_1, SIM_TIME, (draws("counter_b", tb, n),), cancelled, cancel_margin=tb)
+            start_3, end_3 = station(end_2, SIM_TIME, (draws("counter_c", tc, n),), cancelled, cancel_margin=tc)
+            stages = ((start_1, end_1), (start_2, end_2), (start_3, end_3))
+
+        records = self.records
+        records.arrival = array('d', arrivals)
+        records.lane_entry = array('d', arrivals)  # the lane is held for zero time
+        for k, (start, end) in enumerate(stages, 1):
+            setattr(records, "start_%d" % k, array('d', start))
+            setattr(records, "end_%d" % k, array('d', end))
+        for k in range(len(stages) + 1, CustomerRecords.STAGES + 1):
+            setattr(records, "start_%d" % k, array('d', [math.nan]) * n)
+            setattr(records, "end_%d" % k, array('d', [math.nan]) * n)
+        records.departure = array('d', stages[-1][1])
+        records.cancelled = array('b', cancelled)
+        return DriveThruResult(config.num_counters, records)
+
+
+def station(requests, sim_time, parts, cancelled, cancel_margin=None, wait_margin=None):
+    # One counter of run_kernel(). requests[i] is when customer i asks for it
+    # (NaN if never); parts are the service-time iterators used in turn while
+    # holding the counter (counterFirstSecond takes A, B, A, B). The closing rules
+    # are those of the simpy processes: with cancel_margin the customer gives up
+    # when request + margin >= sim_time, but its request still holds the counter
+    # until request + 0.5; with wait_margin (customer3A) it waits 0.5 and is
+    # served anyway
+    n = len(requests)
+    start = [math.nan] * n
+    end = [math.nan] * n
+    free = -math.inf
+    for i, r in enumerate(requests):
+        if r != r:
+            continue
+        if cancel_margin is not None and r + cancel_margin >= sim_time:
+            cancelled[i] = 1
+            if r + 0.5 > free:
+                free = r + 0.5
+            continue
+        s = r if r > free else free
+        if wait_margin is not None and r + wait_margin >= sim_time and r + 0.5 > s:
+            s = r + 0.5
+        free = s
+        if s >= sim_time:
+            continue
+        start[i] = s
+        t = s
+        for part in parts:
+            if t >= sim_time:
+                break
+            t += next(part)
+        free = t
+        if t < sim_time:
+            end[i] = t
+    return start, end
+
+
+def run_config(config, kernel=False):
+    # Only the summary travels back from pool workers
+    result = DriveThruModel(config, kernel=kernel).run()
+    result.records = None
+    return result
+
+
+def run_scenarios(configs, processes=None, kernel=False):
+    # Runs many scenarios back to back, spread over a process pool
+    return ejecutar_en_paralelo(functools.partial(run_config, kernel=kernel), configs, processes)
+
+
+COMPARISON_METRICS = ("averageTimeService", "throughput", "cancelled")
+
+
+def layout_metrics(config, result):
+    return {
+        "averageTimeService": result.averageTimeService,
+        "throughput": result.served / (config.hour_close - config.hour_open),  # customers per hour
+        "cancelled": result.cancelled,
+    }
+
+
+def compare_layouts(config, replications=30, processes=None, confidence=0.95, kernel=False):
+    # Runs the 2- and 3-counter layouts on the same replication seeds (common
+    # random numbers: both see the same arrival and counter streams) and
+    # summarises the paired differences 3 - 2. "reduction" is how many times
+    # smaller the variance of the difference is than with independent runs
+    configs = []
+    for seed in derivar_semillas(config.seed, replications):
+        for num_counters in (2, 3):
+            variant = copy.copy(config)
+            variant.seed, variant.num_counters = seed, num_counters
+            configs.append(variant)
+    results = run_scenarios(configs, processes, kernel)
+
+    values = {2: [], 3: []}
+    for variant, result in zip(configs, results):
+        values[variant.num_counters].append(layout_metrics(variant, result))
+
+    comparison = {}
+    for metric in COMPARISON_METRICS:
+        two = np.array([v[metric] for v in values[2]], dtype=float)
+        three = np.array([v[metric] for v in values[3]], dtype=float)
+        difference = resumir(three - two, confidence)
+        independent = two.var(ddof=1) + three.var(ddof=1) if replications > 1 else math.nan
+        comparison[metric] = {
+            2: resumir(two, confidence),
+            3: resumir(three, confidence),
+            "difference": difference,
+            "reduction": independent / difference["varianza"] if difference["varianza"] > 0 else math.inf,
+        }
+    return comparison
 
 
-def setup3(env, cr):
-    # Create all counters
-    wl = waitingLane(env)
-    ce1 = counterFirst(env)
-    ce2 = counterSecond(env)
-    ce3 = counterThird(env)
-    i = 0
+if __name__ == "__main__":
+    try:
+        config = DriveThruConfig.from_input()
+    except ValueError as e:
+        print("Error: %s" % e)
+        sys.exit(1)
 
-    # Create more customers while the simulation is running
-    while True:
-        yield env.timeout(random.randint(*cr))
-        i += 1
-        env.process(customer3A(env, "Cust %d" % i, wl, ce1, ce2, ce3))
+    # "--compare [replications]" evaluates both layouts instead of one verbose run
+    if len(sys.argv) > 1 and sys.argv[1] == "--compare":
+        replications = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+        comparison = compare_layouts(config, replications, kernel=True)
+        print("[i] 3 counters - 2 counters, %d paired replications" % replications)
+        for metric in COMPARISON_METRICS:
+            c = comparison[metric]
+            d = c["difference"]
+            print("[i] %-20s 2: %10.4f  3: %10.4f  diff: %10.4f  CI [%.4f, %.4f]  variance / %.1f"
+                  % (metric, c[2]["media"], c[3]["media"], d["media"], d["ic"][0], d["ic"][1], c["reduction"]))
+        sys.exit(0)
 
-if __name__ == "__main__":
     clear()
     print("""
 >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
@@ -304,31 +792,14 @@ if __name__ == "__main__":
 >> Drive-Thru Fast Food Restaurant Design Model Evaluation
 >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>""")
 
-    random.seed(RANDOM_SEED)
-
-    env = simpy.Environment(initial_time=START)
-    print("Environment created at %d!" % env.now)
-
-    if NUM_COUNTERS == 2:
-        env.process(setup2(env, CUSTOMER_RANGE_NORM))
-    elif NUM_COUNTERS == 3:
-        env.process(setup3(env, CUSTOMER_RANGE_NORM))
-    else:
-        print("Error: NUM_COUNTERS debe ser 2 o 3")
-        sys.exit(1)
-
-    print("Setup initialized!")
-    print("Start simulation!")
-    env.run(until=SIM_TIME)
-
-    for i in range(TEMP + 1):
-        SUM_ALL += CALC[i]
-
-    averageTimeService = SUM_ALL / (TEMP + 1)
-    servicePerSecond = 1.00 / (averageTimeService * 60)
-    servicePerMinute = servicePerSecond * 60
+    result = DriveThruModel(config, Bitacora(EVENTOS, SumideroTexto(TEMPLATES, sys.stdout))).run()
 
     print("The end!")
-    print("[i] Model: %d counters" % NUM_COUNTERS)
-    print("[i] Average time:       %.4f" % averageTimeService)
-    print("[i] Service per minute: %f" % servicePerMinute)
\ No newline at end of file
+    print("[i] Model: %d counters" % result.num_counters)
+    print("[i] Average time:       %.4f" % result.averageTimeService)
+    steady = result.steady_state()
+    if steady["n"] > 1:
+        print("[i] Steady-state time:  %.4f  CI [%.4f, %.4f]%s, first %d customers dropped"
+              % (steady["media"], steady["ic"][0], steady["ic"][1],
+                 "" if steady["fiable"] else " (unreliable: few or correlated batches)", steady["truncado"]))
+    print("[i] Service per minute: %f" % result.servicePerMinute)
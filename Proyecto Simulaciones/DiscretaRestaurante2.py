@@ -1,46 +1,157 @@
+import math
+import threading
+from array import array
 import customtkinter as ctk
 import simpy
-import random
-import sys
-import io
+import numpy as np
+from Componentes import VistaPaginada, ejecutar_independiente
+from Aleatorios import FlujosAleatorios
+from Bitacora import SIN_BITACORA
+from Estadisticas import ColectorRecurso
+from Recursos import RecursoMonitoreado
+
+# Eventos que el modelo envía a la bitácora (entidad = número de cliente desde 0)
+LLEGA, TOMA_MESA, DEJA_MESA = range(3)
+NOMBRES_EVENTOS = ("llega", "toma_mesa", "deja_mesa")
+
+PLANTILLAS = {
+    LLEGA: lambda t, i, v: f'Cliente {i+1} llega al restaurante en el minuto {t:.2f}',
+    TOMA_MESA: lambda t, i, v: f'Cliente {i+1} toma una mesa en el minuto {t:.2f}',
+    DEJA_MESA: lambda t, i, v: f'Cliente {i+1} termina de comer y deja la mesa en el minuto {t:.2f}',
+}
+
+
+class ResultadoRestaurante:
+    # Resultado de una corrida: tiempos por cliente en arreglos tipados, el orden
+    # de los eventos para rearmar el detalle y los indicadores, que se van
+    # calculando durante la corrida. El texto sólo se genera al pedirlo
+    def __init__(self, total_clientes, num_mesas):
+        self.num_mesas = num_mesas
+        vacio = array('d', [math.nan]) * total_clientes
+        self.llegada = array('d', vacio)
+        self.inicio = array('d', vacio)  # toma la mesa
+        self.fin = array('d', vacio)  # deja la mesa
+        self.tipo = array('b')
+        self.cliente = array('l')
+        self.indicadores = None
+
+    def registrar(self, tipo, cliente, tiempo):
+        columna = (self.llegada, self.inicio, self.fin)[tipo]
+        columna[cliente] = tiempo
+        self.tipo.append(tipo)
+        self.cliente.append(cliente)
+
+    def columna(self, nombre):
+        # Vista NumPy sin copia de "llegada", "inicio" o "fin"
+        return np.frombuffer(getattr(self, nombre), dtype=float)
+
+    def esperas(self):
+        return self.columna("inicio") - self.columna("llegada")
+
+    def lineas_indicadores(self):
+        i = self.indicadores
+        return [
+            "",
+            "Indicadores obtenidos",
+            f"Clientes atendidos: {i['atendidos']}",
+            f"Espera promedio por una mesa: {i['espera_media']:.2f} minutos (p95 {i['espera_p95']:.2f})",
+            f"Clientes esperando en promedio: {i['cola_media']:.2f}",
+            f"Ocupación de las mesas: {100 * i['ocupacion']:.2f}%",
+            f"Clientes atendidos por hora: {60 * i['clientes_por_minuto']:.2f}",
+        ]
+
+    def __len__(self):
+        # Encabezado, un renglón por evento, cierre e indicadores
+        return len(self.tipo) + 2 + len(self.lineas_indicadores())
+
+    def linea(self, i):
+        eventos = len(self.tipo)
+        if i == 0:
+            return '--- Simulación del Restaurante ---'
+        if i == eventos + 1:
+            return '--- Fin de la simulación ---'
+        if i > eventos + 1:
+            return self.lineas_indicadores()[i - eventos - 2]
+        tipo, cliente = self.tipo[i - 1], self.cliente[i - 1]
+        columna = (self.llegada, self.inicio, self.fin)[tipo]
+        return PLANTILLAS[tipo](columna[cliente], cliente, 0.0)
+
+    def texto(self, inicio=0, cantidad=None):
+        fin = len(self) if cantidad is None else min(len(self), inicio + cantidad)
+        return "\n".join(self.linea(i) for i in range(inicio, fin))
 
 
 class RestauranteSimulacion:
-    def __init__(self, semilla, num_mesas, tiempo_comer_min, tiempo_comer_max, tiempo_llegadas, total_clientes):
+    def __init__(self, semilla, num_mesas, tiempo_comer_min, tiempo_comer_max, tiempo_llegadas, total_clientes, bitacora=SIN_BITACORA, monitoreo=False, flujos=None):
         self.semilla = semilla
         self.num_mesas = num_mesas
         self.tiempo_comer_min = tiempo_comer_min
         self.tiempo_comer_max = tiempo_comer_max
         self.tiempo_llegadas = tiempo_llegadas
         self.total_clientes = total_clientes
+        self.bitacora = bitacora
+        self.monitoreo = monitoreo  # mesas como RecursoMonitoreado
+        self.flujos_dados = flujos  # en lugar de FlujosAleatorios(semilla)
 
-    def cliente(self, env, nombre, restaurante):
-        print(f'{nombre} llega al restaurante en el minuto {env.now:.2f}')
+    def cliente(self, env, numero, restaurante):
+        bitacora = self.bitacora
+        resultado = self.resultado
+        resultado.registrar(LLEGA, numero, env.now)
+        if bitacora.eventos:
+            bitacora.evento(env.now, LLEGA, numero)
         with restaurante.request() as mesa:
+            self.estadisticas.observar()
             yield mesa
-            print(f'{nombre} toma una mesa en el minuto {env.now:.2f}')
-            tiempo_comer = random.randint(self.tiempo_comer_min, self.tiempo_comer_max)
+            resultado.registrar(TOMA_MESA, numero, env.now)
+            self.estadisticas.observar()
+            self.estadisticas.espera(env.now - resultado.llegada[numero])
+            if bitacora.eventos:
+                bitacora.evento(env.now, TOMA_MESA, numero)
+            tiempo_comer = self.flujos["servicio"].entero(self.tiempo_comer_min, self.tiempo_comer_max)
             yield env.timeout(tiempo_comer)
-            print(f'{nombre} termina de comer y deja la mesa en el minuto {env.now:.2f}')
+            resultado.registrar(DEJA_MESA, numero, env.now)
+            if bitacora.eventos:
+                bitacora.evento(env.now, DEJA_MESA, numero)
+        self.estadisticas.observar()
+        self.atendidos += 1
 
     def llegada_clientes(self, env, restaurante):
+        llegadas = self.flujos["llegadas"]
         for i in range(self.total_clientes):
-            yield env.timeout(random.expovariate(1.0 / self.tiempo_llegadas))
-            env.process(self.cliente(env, f'Cliente {i+1}', restaurante))
+            yield env.timeout(llegadas.exponencial(self.tiempo_llegadas))
+            env.process(self.cliente(env, i, restaurante))
 
     def run(self):
-        print('--- Simulación del Restaurante ---')
-        random.seed(self.semilla)
+        if self.bitacora.resumen:
+            self.bitacora.mensaje('--- Simulación del Restaurante ---')
+        # Cada corrida arranca sus propios flujos desde la semilla
+        self.flujos = self.flujos_dados if self.flujos_dados is not None else FlujosAleatorios(self.semilla)
         env = simpy.Environment()
-        restaurante = simpy.Resource(env, self.num_mesas)
+        restaurante = (RecursoMonitoreado if self.monitoreo else simpy.Resource)(env, self.num_mesas)
+        self.resultado = ResultadoRestaurante(self.total_clientes, self.num_mesas)
+        self.estadisticas = ColectorRecurso(env, restaurante)
+        self.atendidos = 0
         env.process(self.llegada_clientes(env, restaurante))
         env.run()
-        print('--- Fin de la simulación ---')
+        if self.bitacora.resumen:
+            self.bitacora.mensaje('--- Fin de la simulación ---')
+
+        resumen = self.estadisticas.resumen(env.now)
+        resumen.update(
+            atendidos=self.atendidos,
+            fin=env.now,
+            ocupacion=resumen["ocupados_media"] / self.num_mesas,
+            clientes_por_minuto=self.atendidos / env.now if env.now > 0 else 0.0,
+        )
+        if self.monitoreo:
+            resumen["recurso"] = restaurante.resumen(env.now)
+        self.resultado.indicadores = resumen
+        return self.resultado
 
 
-class RestaurantSimulationGUI(ctk.CTk):
-    def __init__(self):
-        super().__init__()
+class RestaurantSimulationGUI(ctk.CTkToplevel):
+    def __init__(self, master=None):
+        super().__init__(master)
 
         self.title("Simulación de Restaurante")
         self.geometry("800x600")
@@ -49,6 +160,10 @@ class RestaurantSimulationGUI(ctk.CTk):
         self.grid_columnconfigure(0, weight=1)
         self.grid_rowconfigure(7, weight=1)
 
+        self.hilo = None
+        self.resultado = None
+        self.error = None
+
         self.create_widgets()
 
     def create_widgets(self):
@@ -72,9 +187,8 @@ class RestaurantSimulationGUI(ctk.CTk):
         self.btn_simular = ctk.CTkButton(self, text="Generar Simulación", command=self.run_simulation)
         self.btn_simular.grid(row=len(params), column=0, columnspan=2, pady=20)
 
-        self.txt_resultados = ctk.CTkTextbox(self, width=700, height=300)
-        self.txt_resultados.grid(row=len(params)+1, column=0, columnspan=2, padx=10, pady=10, sticky="nsew")
-        self.txt_resultados.configure(state="disabled")
+        self.vista_resultados = VistaPaginada(self)
+        self.vista_resultados.grid(row=len(params)+1, column=0, columnspan=2, padx=10, pady=10, sticky="nsew")
 
     def validate_inputs(self):
         errors = []
@@ -96,15 +210,13 @@ class RestaurantSimulationGUI(ctk.CTk):
         return errors
 
     def run_simulation(self):
+        if self.hilo is not None and self.hilo.is_alive():
+            return
         errors = self.validate_inputs()
         if errors:
-            self.show_result("\n".join(errors))
+            self.vista_resultados.mostrar_texto("\n".join(errors))
             return
 
-        # Capturar la salida estándar
-        old_stdout = sys.stdout
-        sys.stdout = io.StringIO()
-
         # Ejecutar la simulación
         simulation = RestauranteSimulacion(
             semilla=int(self.entries['semilla'].get()),
@@ -114,25 +226,35 @@ class RestaurantSimulationGUI(ctk.CTk):
             tiempo_llegadas=int(self.entries['tiempo_llegadas'].get()),
             total_clientes=int(self.entries['total_clientes'].get())
         )
-        simulation.run()
+        self.resultado = None
+        self.error = None
+        self.btn_simular.configure(state="disabled")
+        self.vista_resultados.mostrar_texto("Simulando...")
 
-        # Obtener la salida capturada
-        simulation_output = sys.stdout.getvalue()
+        # La simulación corre en un hilo aparte; la ventana sólo consulta si terminó
+        self.hilo = threading.Thread(target=self.trabajo, args=(simulation,), daemon=True)
+        self.hilo.start()
+        self.after(16, self.vigilar)
 
-        # Restaurar la salida estándar
-        sys.stdout = old_stdout
+    def trabajo(self, simulation):
+        try:
+            self.resultado = simulation.run()
+        except Exception as e:
+            self.error = e
 
-        # Mostrar los resultados
-        self.show_result(simulation_output)
+    def vigilar(self):
+        if self.hilo.is_alive():
+            self.after(16, self.vigilar)
+            return
 
-    def show_result(self, text):
-        self.txt_resultados.configure(state="normal")
-        self.txt_resultados.delete("1.0", ctk.END)
-        self.txt_resultados.insert(ctk.END, text)
-        self.txt_resultados.configure(state="disabled")
+        self.btn_simular.configure(state="normal")
+        if self.error is not None:
+            self.vista_resultados.mostrar_texto(f"Error: {self.error}")
+        else:
+            # El detalle se arma a medida que la vista lo pide
+            self.vista_resultados.mostrar(len(self.resultado), self.resultado.texto)
 
 
 if __name__ == "__main__":
     ctk.set_default_color_theme("blue")  # Themes: blue (default), dark-blue, green
-    app = RestaurantSimulationGUI()
-    app.mainloop()
+    ejecutar_independiente(RestaurantSimulationGUI)
@@ -1,12 +1,178 @@
+import threading
 import simpy
-import random
-import sys
-import io
+from array import array
 import customtkinter as ctk
+from Componentes import VistaPaginada, ejecutar_independiente
+from Aleatorios import FlujosAleatorios
+from Bitacora import Bitacora, SumideroTexto, SIN_BITACORA, EVENTOS
+from Estadisticas import medias_por_lotes
+from Trazas import abrir_traza
+from Recursos import RecursoMonitoreado
 
-class NetworkSimulationApp(ctk.CTk):
-    def __init__(self):
-        super().__init__()
+# Eventos que el modelo envía a la bitácora (entidad = número de paquete desde 0)
+LLEGA, PERDIDO, INICIO, FIN = range(4)
+NOMBRES_EVENTOS = ("llega", "perdido", "inicio", "fin")
+
+PLANTILLAS = {
+    LLEGA: lambda t, i, v: f'Paquete {i+1} llega al servidor en el segundo {t:.2f}',
+    PERDIDO: lambda t, i, v: f'Paquete {i+1} se pierde debido a cola llena en el segundo {t:.2f}',
+    INICIO: lambda t, i, v: f'Paquete {i+1} comienza a ser procesado después de esperar {v:.2f} segundos en el segundo {t:.2f}',
+    FIN: lambda t, i, v: f'Paquete {i+1} termina de ser procesado en el segundo {t:.2f}',
+}
+
+class SimulacionRed:
+    # Con `traza` (ruta o TrazaBinaria/TrazaCSV) las llegadas se reproducen de la
+    # captura en lugar de sortearse y tiempo_llegadas no se usa; total_paquetes
+    # limita cuántos se leen (None = toda la traza). Con tamano_referencia el
+    # tiempo sorteado es el de un paquete de ese tamaño en bytes y se escala con
+    # el tamaño de cada paquete de la traza. Con monitoreo el servidor registra
+    # cada cambio de estado y la utilización es la medida, no la estimada.
+    # `flujos` reemplaza a FlujosAleatorios(semilla) (antitéticos, estratos...).
+    # Con estacionario se guarda la espera de cada paquete para estimar la espera
+    # de régimen (MSER + medias de lotes); apagado, la memoria no crece con la corrida
+    def __init__(self, semilla, capacidad_servidor, capacidad_cola, tiempo_procesamiento_min, tiempo_procesamiento_max, tiempo_llegadas, total_paquetes, bitacora=SIN_BITACORA,
+                 traza=None, tamano_referencia=None, monitoreo=False, flujos=None, estacionario=False):
+        self.semilla = semilla
+        self.capacidad_servidor = capacidad_servidor
+        self.capacidad_cola = capacidad_cola
+        self.tiempo_procesamiento_min = tiempo_procesamiento_min
+        self.tiempo_procesamiento_max = tiempo_procesamiento_max
+        self.tiempo_llegadas = tiempo_llegadas
+        self.total_paquetes = total_paquetes
+        self.bitacora = bitacora
+        self.traza = abrir_traza(traza) if isinstance(traza, str) else traza
+        self.tamano_referencia = tamano_referencia
+        self.monitoreo = monitoreo
+        self.flujos_dados = flujos
+
+        # Variables para seguimiento de estadísticas
+        self.paquetes_perdidos = 0
+        self.tiempo_total_espera = 0
+        self.paquetes_procesados = 0
+        self.tiempo_ocupado = 0
+        self.ultima_llegada = 0.0
+        self.estacionario = estacionario
+        self.esperas = array('d') if estacionario else None  # en orden de atención
+
+    # Función para simular el proceso de un paquete
+    def paquete(self, env, numero, servidor, tamano=None):
+        llegada = env.now  # Momento de llegada del paquete al sistema
+        bitacora = self.bitacora
+        if bitacora.eventos:
+            bitacora.evento(llegada, LLEGA, numero)
+
+        with servidor.request() as req:
+            # Si el servidor y la cola están llenos, el paquete se pierde
+            if len(servidor.queue) >= self.capacidad_cola:
+                self.paquetes_perdidos += 1
+                if bitacora.eventos:
+                    bitacora.evento(env.now, PERDIDO, numero)
+                return
+
+            # El paquete espera su turno en la cola si es necesario
+            yield req
+            espera = env.now - llegada
+            self.tiempo_total_espera += espera
+            if self.esperas is not None:
+                self.esperas.append(espera)
+            if bitacora.eventos:
+                bitacora.evento(env.now, INICIO, numero, espera)
+
+            # Simula el tiempo de procesamiento del paquete
+            tiempo_procesamiento = self.flujos["servicio"].entero(self.tiempo_procesamiento_min, self.tiempo_procesamiento_max)
+            if self.tamano_referencia:
+                tiempo_procesamiento *= tamano / self.tamano_referencia
+            self.tiempo_ocupado += tiempo_procesamiento
+            yield env.timeout(tiempo_procesamiento)
+            if bitacora.eventos:
+                bitacora.evento(env.now, FIN, numero)
+            self.paquetes_procesados += 1
+
+    # Función para la llegada de paquetes
+    def llegada_paquetes(self, env, servidor):
+        if self.traza is not None:
+            yield from self.llegada_traza(env, servidor)
+            return
+        llegadas = self.flujos["llegadas"]
+        for i in range(self.total_paquetes):
+            yield env.timeout(llegadas.exponencial(self.tiempo_llegadas))
+            env.process(self.paquete(env, i, servidor))
+        self.ultima_llegada = env.now
+
+    def llegada_traza(self, env, servidor):
+        # La traza se recorre por bloques y su primer instante pasa a ser el 0.
+        # Un paquete con marca anterior a la del previo (capturas con varias
+        # interfaces) llega en el mismo instante que aquel
+        limite = self.total_paquetes if self.total_paquetes is not None else float("inf")
+        numero = 0
+        origen = None
+        for tiempos, tamanos in self.traza.bloques():
+            if tamanos is None:
+                if self.tamano_referencia:
+                    raise ValueError("La traza no trae tamaños de paquete para escalar el servicio")
+                tamanos = [None] * len(tiempos)
+            else:
+                if self.tamano_referencia and not tamanos.all():
+                    raise ValueError("La traza tiene paquetes de tamaño 0: no se puede escalar el servicio")
+                tamanos = tamanos.tolist()
+            if origen is None:
+                origen = tiempos[0]
+            for t, tamano in zip((tiempos - origen).tolist(), tamanos):
+                if numero >= limite:
+                    return
+                yield env.timeout(max(t - env.now, 0))
+                env.process(self.paquete(env, numero, servidor, tamano))
+                numero += 1
+                self.ultima_llegada = env.now
+
+    def ejecutar(self):
+        # Configuración y ejecución de la simulación
+        bitacora = self.bitacora
+        if bitacora.resumen:
+            bitacora.mensaje('--- Simulación de Red de Computadoras ---')
+        self.flujos = self.flujos_dados if self.flujos_dados is not None else FlujosAleatorios(self.semilla)
+        env = simpy.Environment()
+        servidor = (RecursoMonitoreado if self.monitoreo else simpy.Resource)(env, self.capacidad_servidor)
+        env.process(self.llegada_paquetes(env, servidor))
+        env.run()
+        # Al vaciarse el sistema cada paquete llegado quedó procesado o perdido
+        total = self.paquetes_procesados + self.paquetes_perdidos
+
+        # Salidas de la simulación
+        resultados = {
+            "procesados": self.paquetes_procesados,
+            "perdidos": self.paquetes_perdidos,
+            "tasa_perdida": self.paquetes_perdidos / total if total > 0 else 0,
+            "espera_media": self.tiempo_total_espera / self.paquetes_procesados if self.paquetes_procesados > 0 else 0,
+            "utilizacion": (self.tiempo_ocupado if self.tamano_referencia else self.paquetes_procesados * (self.tiempo_procesamiento_min + self.tiempo_procesamiento_max) / 2) / env.now,
+            "fin": env.now,
+        }
+        if self.estacionario:
+            # Sin el transitorio del sistema vacío (MSER-5) e IC por medias de lotes
+            resultados["espera_estacionaria"] = medias_por_lotes(self.esperas)
+        if self.monitoreo:
+            resultados["recurso"] = servidor.resumen(env.now)
+            resultados["utilizacion"] = resultados["recurso"]["ocupados_media"]
+        if bitacora.resumen:
+            bitacora.mensaje('--- Fin de la simulación ---')
+            bitacora.mensaje("")
+            bitacora.mensaje("Resultados de la simulación:")
+            bitacora.mensaje(f'Total de paquetes simulados: {total}')
+            bitacora.mensaje(f'Paquetes procesados: {resultados["procesados"]}')
+            bitacora.mensaje(f'Paquetes perdidos: {resultados["perdidos"]}')
+            bitacora.mensaje(f'Tasa de pérdida de paquetes: {100 * resultados["tasa_perdida"]:.2f}%')
+            bitacora.mensaje(f'Tiempo promedio de espera de los paquetes: {resultados["espera_media"]:.2f} segundos')
+            estacionaria = resultados.get("espera_estacionaria")
+            if estacionaria is not None and estacionaria["n"] > 1:
+                aviso = "" if estacionaria["fiable"] else " (poco fiable: pocos lotes o lotes correlacionados)"
+                bitacora.mensaje(f'Espera en régimen (sin los primeros {estacionaria["truncado"]} paquetes): '
+                                 f'{estacionaria["media"]:.2f} segundos, IC95% [{estacionaria["ic"][0]:.2f}, {estacionaria["ic"][1]:.2f}]{aviso}')
+            bitacora.mensaje(f'Utilización del servidor: {100 * resultados["utilizacion"]:.2f}%')
+        return resultados
+
+class NetworkSimulationApp(ctk.CTkToplevel):
+    def __init__(self, master=None):
+        super().__init__(master)
 
         self.title("Simulación de Red de Computadoras")
         self.geometry("800x600")
@@ -15,6 +181,10 @@ class NetworkSimulationApp(ctk.CTk):
         self.grid_columnconfigure(0, weight=1)
         self.grid_rowconfigure(8, weight=1)
 
+        self.hilo = None
+        self.sumidero = None
+        self.error = None
+
         self.create_widgets()
 
     def create_widgets(self):
@@ -39,9 +209,8 @@ class NetworkSimulationApp(ctk.CTk):
         self.btn_simular = ctk.CTkButton(self, text="Empezar Simulación", command=self.run_simulation)
         self.btn_simular.grid(row=len(params), column=0, columnspan=2, pady=20)
 
-        self.txt_resultados = ctk.CTkTextbox(self, width=700, height=300)
-        self.txt_resultados.grid(row=len(params)+1, column=0, columnspan=2, padx=10, pady=10, sticky="nsew")
-        self.txt_resultados.configure(state="disabled")
+        self.vista_resultados = VistaPaginada(self)
+        self.vista_resultados.grid(row=len(params)+1, column=0, columnspan=2, padx=10, pady=10, sticky="nsew")
 
     def validate_inputs(self):
         errors = []
@@ -65,100 +234,60 @@ class NetworkSimulationApp(ctk.CTk):
         return errors
 
     def run_simulation(self):
+        if self.hilo is not None and self.hilo.is_alive():
+            return
         errors = self.validate_inputs()
         if errors:
-            self.show_result("\n".join(errors))
+            self.vista_resultados.mostrar_texto("\n".join(errors))
             return
 
-        # Capturar la salida estándar
-        old_stdout = sys.stdout
-        sys.stdout = io.StringIO()
+        # Los parámetros se leen aquí: los widgets sólo se tocan desde la ventana
+        simulacion = self.simulate()
+        self.sumidero = None
+        self.error = None
+        self.btn_simular.configure(state="disabled")
+        self.vista_resultados.mostrar_texto("Simulando...")
 
-        # Ejecutar la simulación
-        self.simulate()
+        # La simulación corre en un hilo aparte; la ventana sólo consulta si terminó
+        self.hilo = threading.Thread(target=self.trabajo, args=(simulacion,), daemon=True)
+        self.hilo.start()
+        self.after(16, self.vigilar)
 
-        # Obtener la salida capturada
-        simulation_output = sys.stdout.getvalue()
+    def trabajo(self, simulacion):
+        try:
+            simulacion.ejecutar()
+            self.sumidero = simulacion.bitacora.sumidero
+        except Exception as e:
+            self.error = e
 
-        # Restaurar la salida estándar
-        sys.stdout = old_stdout
+    def vigilar(self):
+        if self.hilo.is_alive():
+            self.after(16, self.vigilar)
+            return
 
-        # Mostrar los resultados
-        self.show_result(simulation_output)
+        self.btn_simular.configure(state="normal")
+        if self.error is not None:
+            self.vista_resultados.mostrar_texto(f"Error: {self.error}")
+        else:
+            # La bitácora junta las líneas en memoria; se muestran por páginas
+            self.vista_resultados.mostrar(len(self.sumidero.lineas), self.sumidero.texto)
 
     def simulate(self):
         # Obtener parámetros de la interfaz
-        SEMILLA = int(self.entries['semilla'].get())
-        CAPACIDAD_SERVIDOR = int(self.entries['capacidad_servidor'].get())
-        CAPACIDAD_COLA = int(self.entries['capacidad_cola'].get())
-        TIEMPO_PROCESAMIENTO_MIN = int(self.entries['tiempo_procesamiento_min'].get())
-        TIEMPO_PROCESAMIENTO_MAX = int(self.entries['tiempo_procesamiento_max'].get())
-        TIEMPO_LLEGADAS = float(self.entries['tiempo_llegadas'].get())
-        TOTAL_PAQUETES = int(self.entries['total_paquetes'].get())
-
-        # Variables para seguimiento de estadísticas
-        paquetes_perdidos = 0
-        tiempo_total_espera = 0
-        paquetes_procesados = 0
-
-        # Función para simular el proceso de un paquete
-        def paquete(env, nombre, servidor):
-            nonlocal paquetes_perdidos, tiempo_total_espera, paquetes_procesados
-
-            llegada = env.now  # Momento de llegada del paquete al sistema
-            print(f'{nombre} llega al servidor en el segundo {llegada:.2f}')
-
-            with servidor.request() as req:
-                # Si el servidor y la cola están llenos, el paquete se pierde
-                if len(servidor.queue) >= CAPACIDAD_COLA:
-                    paquetes_perdidos += 1
-                    print(f'{nombre} se pierde debido a cola llena en el segundo {env.now:.2f}')
-                    return
-
-                # El paquete espera su turno en la cola si es necesario
-                yield req
-                espera = env.now - llegada
-                tiempo_total_espera += espera
-                print(f'{nombre} comienza a ser procesado después de esperar {espera:.2f} segundos en el segundo {env.now:.2f}')
-
-                # Simula el tiempo de procesamiento del paquete
-                tiempo_procesamiento = random.randint(TIEMPO_PROCESAMIENTO_MIN, TIEMPO_PROCESAMIENTO_MAX)
-                yield env.timeout(tiempo_procesamiento)
-                print(f'{nombre} termina de ser procesado en el segundo {env.now:.2f}')
-                paquetes_procesados += 1
-
-        # Función para la llegada de paquetes
-        def llegada_paquetes(env, servidor):
-            for i in range(TOTAL_PAQUETES):
-                yield env.timeout(random.expovariate(1.0 / TIEMPO_LLEGADAS))
-                env.process(paquete(env, f'Paquete {i+1}', servidor))
-
-        # Configuración y ejecución de la simulación
-        print('--- Simulación de Red de Computadoras ---')
-        random.seed(SEMILLA)
-        env = simpy.Environment()
-        servidor = simpy.Resource(env, CAPACIDAD_SERVIDOR)
-        env.process(llegada_paquetes(env, servidor))
-        env.run()
-        print('--- Fin de la simulación ---')
-
-        # Salidas de la simulación
-        print("\nResultados de la simulación:")
-        print(f'Total de paquetes simulados: {TOTAL_PAQUETES}')
-        print(f'Paquetes procesados: {paquetes_procesados}')
-        print(f'Paquetes perdidos: {paquetes_perdidos}')
-        print(f'Tasa de pérdida de paquetes: {100 * paquetes_perdidos / TOTAL_PAQUETES:.2f}%')
-        print(f'Tiempo promedio de espera de los paquetes: {tiempo_total_espera / paquetes_procesados if paquetes_procesados > 0 else 0:.2f} segundos')
-        print(f'Utilización del servidor: {100 * (paquetes_procesados * (TIEMPO_PROCESAMIENTO_MIN + TIEMPO_PROCESAMIENTO_MAX) / 2) / env.now:.2f}%')
-
-    def show_result(self, text):
-        self.txt_resultados.configure(state="normal")
-        self.txt_resultados.delete("1.0", ctk.END)
-        self.txt_resultados.insert(ctk.END, text)
-        self.txt_resultados.configure(state="disabled")
+        sumidero = SumideroTexto(PLANTILLAS)
+        return SimulacionRed(
+            semilla=int(self.entries['semilla'].get()),
+            capacidad_servidor=int(self.entries['capacidad_servidor'].get()),
+            capacidad_cola=int(self.entries['capacidad_cola'].get()),
+            tiempo_procesamiento_min=int(self.entries['tiempo_procesamiento_min'].get()),
+            tiempo_procesamiento_max=int(self.entries['tiempo_procesamiento_max'].get()),
+            tiempo_llegadas=float(self.entries['tiempo_llegadas'].get()),
+            total_paquetes=int(self.entries['total_paquetes'].get()),
+            bitacora=Bitacora(EVENTOS, sumidero),
+            estacionario=True
+        )
 
 
 if __name__ == "__main__":
     ctk.set_default_color_theme("blue")
-    app = NetworkSimulationApp()
-    app.mainloop()
+    ejecutar_independiente(NetworkSimulationApp)
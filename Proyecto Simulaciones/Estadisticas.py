@@ -0,0 +1,196 @@
+import math
+import numpy as np
+
+
+class PromedioTemporal:
+    # Promedio ponderado por tiempo de una variable de estado escalonada
+    # (largo de la cola, servidores ocupados...), actualizado en O(1) por cambio
+    def __init__(self, t0=0.0, valor=0):
+        self.t0 = t0
+        self.t = t0
+        self.valor = valor
+        self.area = 0.0
+        self.area2 = 0.0
+        self.maximo = valor
+
+    def actualizar(self, t, valor):
+        dt = t - self.t
+        self.area += self.valor * dt
+        self.area2 += self.valor * self.valor * dt
+        self.t = t
+        self.valor = valor
+        if valor > self.maximo:
+            self.maximo = valor
+
+    def media(self, t=None):
+        t = self.t if t is None else t
+        duracion = t - self.t0
+        if duracion <= 0:
+            return 0.0
+        return (self.area + self.valor * (t - self.t)) / duracion
+
+    def varianza(self, t=None):
+        t = self.t if t is None else t
+        duracion = t - self.t0
+        if duracion <= 0:
+            return 0.0
+        media = self.media(t)
+        return (self.area2 + self.valor * self.valor * (t - self.t)) / duracion - media * media
+
+
+class Welford:
+    # Media y varianza en una pasada (Welford); los lotes se combinan con la
+    # fórmula de Chan para no recorrerlos elemento a elemento
+    def __init__(self):
+        self.n = 0
+        self.media = 0.0
+        self.m2 = 0.0
+
+    def agregar(self, x):
+        self.n += 1
+        delta = x - self.media
+        self.media += delta / self.n
+        self.m2 += delta * (x - self.media)
+
+    def agregar_lote(self, valores):
+        valores = np.asarray(valores, dtype=float)
+        n_b = len(valores)
+        if n_b == 0:
+            return
+        media_b = float(valores.mean())
+        m2_b = float(((valores - media_b) ** 2).sum())
+        n = self.n + n_b
+        delta = media_b - self.media
+        self.media += delta * n_b / n
+        self.m2 += m2_b + delta * delta * self.n * n_b / n
+        self.n = n
+
+    def varianza(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else 0.0
+
+
+class CuantilesLogaritmicos:
+    # Resumen de cuantiles con error relativo acotado (al estilo DDSketch): cada
+    # valor positivo cae en un bucket logarítmico y sólo se guardan los conteos,
+    # así la memoria depende del rango de valores y no de la cantidad observada
+    def __init__(self, precision=0.01, minimo=1e-9):
+        self.gamma = (1 + precision) / (1 - precision)
+        self.log_gamma = math.log(self.gamma)
+        self.minimo = minimo
+        self.ceros = 0  # valores <= minimo (p. ej. clientes que no esperan)
+        self.conteos = {}
+        self.n = 0
+
+    def agregar(self, x):
+        self.n += 1
+        if x <= self.minimo:
+            self.ceros += 1
+            return
+        i = math.ceil(math.log(x) / self.log_gamma)
+        self.conteos[i] = self.conteos.get(i, 0) + 1
+
+    def agregar_lote(self, valores):
+        valores = np.asarray(valores, dtype=float)
+        self.n += len(valores)
+        positivos = valores[valores > self.minimo]
+        self.ceros += len(valores) - len(positivos)
+        indices, conteos = np.unique(np.ceil(np.log(positivos) / self.log_gamma).astype(np.int64), return_counts=True)
+        for i, c in zip(indices.tolist(), conteos.tolist()):
+            self.conteos[i] = self.conteos.get(i, 0) + c
+
+    def cuantil(self, q):
+        if self.n == 0:
+            return math.nan
+        rango = q * (self.n - 1)
+        acumulado = self.ceros
+        if rango < acumulado:
+            return 0.0
+        for i in sorted(self.conteos):
+            acumulado += self.conteos[i]
+            if rango < acumulado:
+                return 2 * self.gamma ** i / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.conteos) / (self.gamma + 1)
+
+
+class ColectorRecurso:
+    # Estadísticas en línea de un simpy.Resource: largo de la cola y servidores
+    # ocupados ponderados por tiempo, más media, varianza y cuantiles de la espera.
+    # El modelo llama a observar() cada vez que pide o libera el recurso
+    def __init__(self, env, recurso, precision=0.01):
+        self.env = env
+        self.recurso = recurso
+        self.cola = PromedioTemporal(env.now)
+        self.ocupados = PromedioTemporal(env.now)
+        self.esperas = Welford()
+        self.cuantiles = CuantilesLogaritmicos(precision)
+
+    def observar(self):
+        ahora = self.env.now
+        self.cola.actualizar(ahora, len(self.recurso.queue))
+        self.ocupados.actualizar(ahora, self.recurso.count)
+
+    def espera(self, x):
+        self.esperas.agregar(x)
+        self.cuantiles.agregar(x)
+
+    def agregar_esperas(self, esperas):
+        self.esperas.agregar_lote(esperas)
+        self.cuantiles.agregar_lote(esperas)
+
+    def resumen(self, fin):
+        return {
+            "cola_media": self.cola.media(fin),
+            "cola_varianza": self.cola.varianza(fin),
+            "cola_max": self.cola.maximo,
+            "ocupados_media": self.ocupados.media(fin),
+            "espera_media": self.esperas.media,
+            "espera_varianza": self.esperas.varianza(),
+            "espera_p95": self.cuantiles.cuantil(0.95),
+            "espera_p99": self.cuantiles.cuantil(0.99),
+        }
+
+
+def mser(valores, lote=5):
+    # Punto de truncamiento del calentamiento por MSER-m: se promedian lotes de
+    # `lote` observaciones y se elige el corte d (hasta la mitad de la serie) que
+    # minimiza la varianza de la media restante, SS(d) / (k - d)^2
+    valores = np.asarray(valores, dtype=float)
+    k = len(valores) // lote
+    if k < 2:
+        return 0
+    y = valores[:k * lote].reshape(k, lote).mean(axis=1)
+    suma = np.cumsum(y[::-1])[::-1]
+    suma2 = np.cumsum((y * y)[::-1])[::-1]
+    restantes = np.arange(k, 0, -1)
+    estadistico = (suma2 - suma * suma / restantes) / (restantes * restantes)
+    return int(np.argmin(estadistico[:k // 2 + 1])) * lote
+
+
+def medias_por_lotes(valores, lotes=None, confianza=0.95, lote_mser=5, tamano_minimo=10, lotes_minimos=10,
+                     autocorrelacion_maxima=0.2):
+    # Media de régimen de una sola corrida larga: descarta el calentamiento
+    # detectado por MSER y arma el intervalo con las medias de lotes
+    # consecutivos, unos √n lotes de al menos tamano_minimo observaciones. El
+    # intervalo sólo vale si las medias de los lotes son casi independientes:
+    # con menos de lotes_minimos lotes o autocorrelación de orden 1 mayor que
+    # autocorrelacion_maxima se marca fiable=False
+    from Replicas import resumir  # diferido: scipy sólo se carga si se usa
+    valores = np.asarray(valores, dtype=float)
+    truncado = mser(valores, lote_mser)
+    resto = valores[truncado:]
+    if lotes is None:
+        lotes = min(int(math.sqrt(len(resto))), len(resto) // tamano_minimo)
+    lotes = max(1, min(lotes, len(resto)))
+    tamano = len(resto) // lotes
+    if tamano == 0:
+        return {"n": 0, "media": math.nan, "varianza": math.nan, "ic": (math.nan, math.nan),
+                "truncado": truncado, "tamano_lote": 0, "autocorrelacion": math.nan, "fiable": False}
+    medias = resto[:lotes * tamano].reshape(lotes, tamano).mean(axis=1)
+    resultado = resumir(medias, confianza)
+    autocorrelacion = math.nan
+    if lotes > 2 and medias.var() > 0:
+        centradas = medias - medias.mean()
+        autocorrelacion = float((centradas[:-1] * centradas[1:]).sum() / (centradas * centradas).sum())
+    fiable = lotes >= lotes_minimos and autocorrelacion <= autocorrelacion_maxima
+    resultado.update(truncado=truncado, tamano_lote=tamano, autocorrelacion=autocorrelacion, fiable=fiable)
+    return resultado
@@ -0,0 +1,99 @@
+import math
+from DiscretaPeluqueria import SimulacionPeluqueria
+from Replicas import derivar_semillas, resumir, ejecutar_en_paralelo
+
+
+def _replica(tarea):
+    semilla, parametros, metrica = tarea
+    simulacion = SimulacionPeluqueria(semilla, *parametros, vectorizado=True, traza=False)
+    return simulacion.ejecutar_simulacion()[metrica]
+
+
+class OptimizadorPeluqueria:
+    # Busca cuántos peluqueros hacen falta para que la espera (promedio "tep" o
+    # percentil "espera_p95") quede por debajo de un objetivo. Todas las
+    # configuraciones usan las mismas semillas, así la búsqueda es reproducible,
+    # pero cada candidato se compara contra el objetivo por separado, no contra el
+    # vecino. Se evalúa por lotes de réplicas hasta que el intervalo decide; como
+    # el intervalo se mira después de cada lote, cada mirada usa el nivel de
+    # Bonferroni 1 - (1 - confianza) / miradas, con miradas el máximo posible, y
+    # la probabilidad de que algún intervalo quede entero del lado equivocado no
+    # pasa de 1 - confianza (al llegar a replicas_max se decide por la media)
+    def __init__(self, tiempo_corte_min, tiempo_corte_max, t_llegadas, tot_clientes, objetivo, metrica="tep",
+                 semilla=1, replicas_min=5, replicas_max=50, lote=5, confianza=0.95, procesos=1):
+        self.tiempo_corte_min = tiempo_corte_min
+        self.tiempo_corte_max = tiempo_corte_max
+        self.t_llegadas = t_llegadas
+        self.tot_clientes = tot_clientes
+        self.objetivo = objetivo
+        self.metrica = metrica
+        self.replicas_min = replicas_min
+        self.replicas_max = replicas_max
+        self.lote = lote
+        self.confianza = confianza
+        self.procesos = procesos
+        self.semillas = derivar_semillas(semilla, replicas_max)
+        self.miradas = 1 + math.ceil(max(replicas_max - replicas_min, 0) / lote)
+        self.confianza_mirada = 1 - (1 - confianza) / self.miradas
+        self.replicas_usadas = 0
+        self.evaluaciones = {}
+
+    def evaluar(self, num_peluqueros, t_llegadas=None):
+        # Devuelve (cumple, resumen). Se detiene en cuanto el intervalo queda entero a
+        # un lado del objetivo; si llega a replicas_max decide por la media
+        t_llegadas = self.t_llegadas if t_llegadas is None else t_llegadas
+        parametros = (num_peluqueros, self.tiempo_corte_min, self.tiempo_corte_max, t_llegadas, self.tot_clientes)
+        valores = []
+        while len(valores) < self.replicas_max:
+            n = self.replicas_min if not valores else self.lote
+            semillas = self.semillas[len(valores):len(valores) + n]
+            valores += ejecutar_en_paralelo(_replica, [(s, parametros, self.metrica) for s in semillas], self.procesos)
+            self.replicas_usadas += len(semillas)
+            resumen = resumir(valores, self.confianza_mirada)
+            if resumen["ic"][1] < self.objetivo or resumen["ic"][0] > self.objetivo:
+                break
+        self.evaluaciones[(num_peluqueros, t_llegadas)] = resumen
+        return resumen["media"] <= self.objetivo, resumen
+
+    def minimo_peluqueros(self, max_peluqueros=100):
+        # Por debajo de carga/t_llegadas peluqueros el sistema es inestable, así que la
+        # búsqueda empieza en el primer valor estable y sube de a uno
+        media_corte = (self.tiempo_corte_min + self.tiempo_corte_max) / 2
+        inicio = max(1, math.floor(media_corte / self.t_llegadas) + 1)
+        for num_peluqueros in range(inicio, max_peluqueros + 1):
+            cumple, _ = self.evaluar(num_peluqueros)
+            if cumple:
+                return num_peluqueros
+        return None
+
+    def max_tasa_llegadas(self, num_peluqueros, t_llegadas_max, tolerancia=0.01):
+        # Menor tiempo entre llegadas (mayor tasa) que num_peluqueros soporta cumpliendo
+        # el objetivo, por bisección. t_llegadas_max debe ser una carga que sí se cumple
+        media_corte = (self.tiempo_corte_min + self.tiempo_corte_max) / 2
+        bajo = media_corte / num_peluqueros  # saturación: nunca cumple
+        alto = t_llegadas_max
+        if not self.evaluar(num_peluqueros, alto)[0]:
+            return None
+        while (alto - bajo) / alto > tolerancia:
+            medio = (alto + bajo) / 2
+            if self.evaluar(num_peluqueros, medio)[0]:
+                alto = medio
+            else:
+                bajo = medio
+        return 1.0 / alto
+
+
+if __name__ == "__main__":
+    optimizador = OptimizadorPeluqueria(15, 30, 4, 20000, objetivo=5.0)
+    peluqueros = optimizador.minimo_peluqueros()
+    print(f"Peluqueros necesarios: {peluqueros}")
+    for (c, _), r in sorted(optimizador.evaluaciones.items()):
+        print(f"  {c} peluqueros: {r['n']} réplicas, media {r['media']:.3f}, IC [{r['ic'][0]:.3f}, {r['ic'][1]:.3f}]")
+    print(f"Réplicas usadas: {optimizador.replicas_usadas}")
+    if peluqueros is not None:
+        tasa = optimizador.max_tasa_llegadas(peluqueros, 4)
+        if tasa is None:
+            print(f"Con {peluqueros} peluqueros no se cumple el objetivo ni con 4 minutos entre llegadas")
+        else:
+            print(f"Tasa máxima de llegadas con {peluqueros} peluqueros: {tasa:.4f} clientes/minuto")
+    print(f"Réplicas usadas en total: {optimizador.replicas_usadas}")
@@ -0,0 +1,24 @@
+import os
+import pickle
+
+# Estado de corridas largas en disco (pickle). Se escribe en un temporal que
+# reemplaza al archivo de una vez: un corte a mitad de la escritura deja
+# intacto el punto de control anterior
+VERSION = 1
+
+
+def guardar_estado(ruta, estado):
+    temporal = f"{ruta}.tmp"
+    with open(temporal, "wb") as archivo:
+        pickle.dump((VERSION, estado), archivo, protocol=pickle.HIGHEST_PROTOCOL)
+        archivo.flush()
+        os.fsync(archivo.fileno())
+    os.replace(temporal, ruta)
+
+
+def cargar_estado(ruta):
+    with open(ruta, "rb") as archivo:
+        version, estado = pickle.load(archivo)
+    if version != VERSION:
+        raise ValueError(f"Punto de control de una versión distinta ({version})")
+    return estado
@@ -0,0 +1,85 @@
+from array import array
+import numpy as np
+import simpy
+from simpy.core import BoundClass
+from simpy.resources.resource import Request
+
+
+class PeticionMonitoreada(Request):
+    # Una petición cancelada antes de obtener el recurso (p. ej. el paquete que
+    # encuentra la cola llena y sale del `with`) cuenta como rechazo
+    def cancel(self):
+        if not self.triggered:
+            super().cancel()
+            self.resource.rechazos += 1
+            self.resource._registrar()
+
+
+class RecursoMonitoreado(simpy.Resource):
+    # simpy.Resource que guarda cada cambio de (servidores ocupados, largo de la
+    # cola) con su instante en arreglos tipados. Se usa igual que el original;
+    # el registro cuesta una comparación y, si el estado cambió, tres append.
+    # El estado del renglón k rige desde tiempos[k] hasta tiempos[k + 1]
+    request = BoundClass(PeticionMonitoreada)
+
+    def __init__(self, env, capacity=1):
+        super().__init__(env, capacity)
+        self.tiempos = array('d', [env.now])
+        self.ocupados = array('q', [0])
+        self.cola = array('q', [0])
+        self.rechazos = 0
+
+    def _registrar(self):
+        ocupados, cola = len(self.users), len(self.put_queue)
+        if ocupados != self.ocupados[-1] or cola != self.cola[-1]:
+            self.tiempos.append(self._env.now)
+            self.ocupados.append(ocupados)
+            self.cola.append(cola)
+
+    # Toda llegada pasa por _trigger_put (entra en servicio o a la cola) y toda
+    # liberación por _do_get; al procesarse la liberación, _trigger_put da el
+    # recurso al siguiente
+    def _trigger_put(self, get_event):
+        super()._trigger_put(get_event)
+        self._registrar()
+
+    def _do_get(self, event):
+        super()._do_get(event)
+        self._registrar()
+
+    def _duraciones(self, fin):
+        tiempos = np.frombuffer(self.tiempos, dtype=float)
+        fin = self._env.now if fin is None else fin
+        return np.diff(np.append(tiempos, fin))
+
+    def _distribucion(self, valores, fin):
+        # Fracción del tiempo con k = 0, 1, 2... en la columna
+        duraciones = self._duraciones(fin)
+        total = duraciones.sum()
+        pesos = np.bincount(np.frombuffer(valores, dtype=np.int64), weights=duraciones)
+        # Sin los estados de duración nula del final (p. ej. el rechazado que se
+        # encoló y canceló en el mismo instante)
+        pesos = np.trim_zeros(pesos, "b")
+        return pesos / total if total > 0 else pesos
+
+    def distribucion_cola(self, fin=None):
+        return self._distribucion(self.cola, fin)
+
+    def distribucion_ocupados(self, fin=None):
+        return self._distribucion(self.ocupados, fin)
+
+    def resumen(self, fin=None):
+        cola = self.distribucion_cola(fin)
+        ocupados = self.distribucion_ocupados(fin)
+        ocupados_media = float((np.arange(len(ocupados)) * ocupados).sum())
+        return {
+            "utilizacion": ocupados_media / self.capacity,
+            "ocupados_media": ocupados_media,
+            "cola_media": float((np.arange(len(cola)) * cola).sum()),
+            "cola_max": max(len(cola) - 1, 0),
+            "cola_vacia": float(cola[0]) if len(cola) else 1.0,
+            "distribucion_cola": cola,
+            "distribucion_ocupados": ocupados,
+            "rechazos": self.rechazos,
+            "cambios": len(self.tiempos),
+        }
@@ -0,0 +1,390 @@
+import math
+import heapq
+from bisect import bisect_right
+from collections import deque
+import numpy as np
+from Aleatorios import FlujosAleatorios
+from PuntosControl import guardar_estado, cargar_estado
+
+# Distribuciones de servicio por nodo (parametro_1, parametro_2)
+ENTERO, EXPONENCIAL, UNIFORME, CONSTANTE = range(4)  # (min, max), (media, -), (min, max), (valor, -)
+
+
+class RedColas:
+    # Red de colas en la línea de SimulacionRed: cada nodo tiene sus servidores,
+    # su cola con la misma regla de descarte (se pierde el paquete que encolado
+    # deja capacidad_cola paquetes en cola, contándose) y su distribución de
+    # servicio. Al terminar en el nodo i el paquete pasa al nodo j con
+    # probabilidad enrutamiento[i, j] y sale de la red con lo que falte para 1.
+    # Los paquetes externos llegan como Poisson al nodo j con tiempo medio entre
+    # llegadas tiempos_llegadas[j] (inf si no recibe). Las tablas de nodos y de
+    # ruteo son arreglos y el motor es un calendario en un heap: no hay un
+    # proceso por paquete
+    def __init__(self, semilla, servidores, capacidad_cola, distribucion, parametro_1, parametro_2,
+                 enrutamiento, tiempos_llegadas, total_paquetes):
+        self.semilla = semilla
+        self.servidores = np.asarray(servidores, dtype=np.int64)
+        n = len(self.servidores)
+        self.capacidad_cola = np.broadcast_to(np.asarray(capacidad_cola, dtype=np.int64), (n,)).copy()
+        self.distribucion = np.broadcast_to(np.asarray(distribucion, dtype=np.int8), (n,)).copy()
+        self.parametro_1 = np.broadcast_to(np.asarray(parametro_1, dtype=float), (n,)).copy()
+        self.parametro_2 = np.broadcast_to(np.asarray(parametro_2, dtype=float), (n,)).copy()
+        self.enrutamiento = np.asarray(enrutamiento, dtype=float)
+        self.tiempos_llegadas = np.broadcast_to(np.asarray(tiempos_llegadas, dtype=float), (n,)).copy()
+        self.total_paquetes = total_paquetes
+        self.estado = None  # estado de la corrida en curso (ver ejecutar)
+
+        if self.enrutamiento.shape != (n, n):
+            raise ValueError("La matriz de enrutamiento debe ser de nodos x nodos")
+        if (self.enrutamiento < 0).any() or (self.enrutamiento.sum(axis=1) > 1 + 1e-12).any():
+            raise ValueError("Cada fila de enrutamiento debe tener probabilidades que sumen a lo sumo 1")
+        if (self.servidores < 1).any():
+            raise ValueError("Cada nodo necesita al menos un servidor")
+        if not np.isfinite(self.tiempos_llegadas).any():
+            raise ValueError("Algún nodo debe recibir llegadas externas")
+
+    def __len__(self):
+        return len(self.servidores)
+
+    def ejecutar(self, hasta=math.inf, punto_control=None, cada=1000000):
+        # Con punto_control (ruta) el estado se guarda cada `cada` eventos; la
+        # corrida retomada con RedColas.reanudar(ruta).ejecutar(...) da los mismos
+        # resultados, bit a bit, que una sin cortes. Una red de un nodo es
+        # SimulacionRed (ver serie), así que sirve para cortar corridas largas de ese modelo.
+        # Con `hasta` la corrida queda en pausa en ese instante: el siguiente
+        # ejecutar() sigue desde ahí; sólo empieza de nuevo si el calendario se vació
+        if self.estado is None or self.estado["terminado"]:
+            self.estado = self._estado_inicial()
+        limite = cada if punto_control is not None else -1
+        while self._avanzar(hasta, limite):
+            guardar_estado(punto_control, self)
+        if punto_control is not None and not self.estado["terminado"]:
+            guardar_estado(punto_control, self)
+        return self._resultados()
+
+    @classmethod
+    def reanudar(cls, ruta):
+        red = cargar_estado(ruta)
+        if not isinstance(red, cls):
+            raise ValueError(f"{ruta} no es un punto de control de RedColas")
+        return red
+
+    def _estado_inicial(self):
+        n = len(self)
+        estado = {
+            "flujos": FlujosAleatorios(self.semilla),
+            # (tiempo, orden, nodo, entrada a la red); nodo -1 = próxima llegada externa
+            "calendario": [],
+            "orden": 0,
+            "ahora": 0.0,
+            "emitidos": 0,
+            "terminado": False,
+            "ocupados": [0] * n,
+            "colas": [deque() for _ in range(n)],  # (entrada a la red, llegada al nodo)
+            "arribos": [0] * n,
+            "perdidos": [0] * n,
+            "atendidos": [0] * n,
+            "espera_total": [0.0] * n,
+            "area_ocupados": [0.0] * n,
+            "area_cola": [0.0] * n,
+            "ultimo": [0.0] * n,
+            "salidas": 0,
+            "permanencia_total": 0.0,
+        }
+        if self.total_paquetes > 0:
+            primera = estado["flujos"]["llegadas"].exponencial(self._media_llegadas()[0])
+            estado["calendario"].append((primera, 0, -1, 0.0))
+            estado["orden"] = 1
+        return estado
+
+    def _media_llegadas(self):
+        # Llegadas externas: un único Poisson con la suma de las tasas, repartido
+        fuentes = np.flatnonzero(np.isfinite(self.tiempos_llegadas))
+        tasas = 1.0 / self.tiempos_llegadas[fuentes]
+        media = float(self.tiempos_llegadas[fuentes[0]]) if len(fuentes) == 1 else 1.0 / tasas.sum()
+        acumulada = np.cumsum(tasas) / tasas.sum()
+        # cumsum y sum redondean distinto: el último puede quedar un ulp bajo 1 y un
+        # sorteo mayor caería fuera de la lista de fuentes
+        acumulada[-1] = 1.0
+        return media, fuentes.tolist(), acumulada.tolist()
+
+    def _avanzar(self, hasta, limite):
+        # Procesa hasta `limite` eventos (-1: sin límite) o hasta el instante
+        # `hasta`; devuelve True si se cortó por el límite de eventos
+        n = len(self)
+        estado = self.estado
+        flujos = estado["flujos"]
+        llegadas = flujos["llegadas"]
+        ruteo = flujos["enrutamiento"]
+        entrada = flujos["entrada"]
+
+        # Tablas en listas de Python: el acceso escalar es lo que más se repite
+        servidores = self.servidores.tolist()
+        capacidad = self.capacidad_cola.tolist()
+        distribucion = self.distribucion.tolist()
+        p1 = self.parametro_1.tolist()
+        p2 = self.parametro_2.tolist()
+        # Ruteo disperso por fila: destinos y probabilidades acumuladas
+        destinos, acumuladas = [], []
+        for i in range(n):
+            fila = np.flatnonzero(self.enrutamiento[i])
+            destinos.append(fila.tolist())
+            acumuladas.append(np.cumsum(self.enrutamiento[i, fila]).tolist())
+        media_llegadas, fuentes_lista, acumulada_fuentes = self._media_llegadas()
+
+        ocupados = estado["ocupados"]
+        colas = estado["colas"]
+        arribos = estado["arribos"]
+        perdidos = estado["perdidos"]
+        atendidos = estado["atendidos"]
+        espera_total = estado["espera_total"]
+        area_ocupados = estado["area_ocupados"]
+        area_cola = estado["area_cola"]
+        ultimo = estado["ultimo"]
+        salidas = estado["salidas"]
+        permanencia_total = estado["permanencia_total"]
+        calendario = estado["calendario"]
+        orden = estado["orden"]
+        ahora = estado["ahora"]
+        emitidos = estado["emitidos"]
+
+        empujar, sacar = heapq.heappush, heapq.heappop
+        muestrear, u_servicio = self._servicio, flujos["servicio"].uniforme
+        eventos = 0
+        cortado = False
+
+        while calendario:
+            if eventos == limite:
+                cortado = True
+                break
+            if calendario[0][0] >= hasta:
+                # Pausa: el evento queda en el calendario para la próxima llamada
+                ahora = hasta
+                break
+            eventos += 1
+            ahora, _, nodo, inicio = sacar(calendario)
+
+            if nodo < 0:
+                # Llegada externa: se agenda la siguiente y el paquete entra a su nodo
+                emitidos += 1
+                if emitidos < self.total_paquetes:
+                    empujar(calendario, (ahora + llegadas.exponencial(media_llegadas), orden, -1, 0.0))
+                    orden += 1
+                inicio = ahora
+                j = fuentes_lista[0] if len(fuentes_lista) == 1 else \
+                    fuentes_lista[bisect_right(acumulada_fuentes, entrada.uniforme())]
+            else:
+                # Fin de servicio en `nodo`: pasa el siguiente de la cola y se enruta
+                i = nodo
+                dt = ahora - ultimo[i]
+                area_ocupados[i] += ocupados[i] * dt
+                area_cola[i] += len(colas[i]) * dt
+                ultimo[i] = ahora
+                atendidos[i] += 1
+                if colas[i]:
+                    siguiente, llegada = colas[i].popleft()
+                    espera_total[i] += ahora - llegada
+                    empujar(calendario, (ahora + muestrear(u_servicio(), distribucion[i], p1[i], p2[i]),
+                                         orden, i, siguiente))
+                    orden += 1
+                else:
+                    ocupados[i] -= 1
+                if destinos[i]:
+                    k = bisect_right(acumuladas[i], ruteo.uniforme())
+                    j = destinos[i][k] if k < len(destinos[i]) else -1
+                else:
+                    j = -1
+                if j < 0:
+                    salidas += 1
+                    permanencia_total += ahora - inicio
+                    continue
+
+            # Llegada del paquete al nodo j
+            dt = ahora - ultimo[j]
+            area_ocupados[j] += ocupados[j] * dt
+            area_cola[j] += len(colas[j]) * dt
+            ultimo[j] = ahora
+            arribos[j] += 1
+            if ocupados[j] < servidores[j]:
+                ocupados[j] += 1
+                empujar(calendario, (ahora + muestrear(u_servicio(), distribucion[j], p1[j], p2[j]),
+                                     orden, j, inicio))
+                orden += 1
+            elif len(colas[j]) + 1 >= capacidad[j]:
+                perdidos[j] += 1
+            else:
+                colas[j].append((inicio, ahora))
+
+        estado.update(salidas=salidas, permanencia_total=permanencia_total, orden=orden, ahora=ahora,
+                      emitidos=emitidos, terminado=not calendario)
+        return cortado
+
+    def _resultados(self):
+        n = len(self)
+        estado = self.estado
+        fin = estado["ahora"]
+        colas = estado["colas"]
+        en_cola = np.array([len(c) for c in colas])
+        area_ocupados = np.array(estado["area_ocupados"]) + \
+            np.array(estado["ocupados"]) * (fin - np.array(estado["ultimo"]))
+        area_cola = np.array(estado["area_cola"]) + en_cola * (fin - np.array(estado["ultimo"]))
+
+        arribos = np.array(estado["arribos"])
+        perdidos = np.array(estado["perdidos"])
+        atendidos = np.array(estado["atendidos"])
+        salidas = estado["salidas"]
+        # Esperas de los que ya pasaron a servicio (los que siguen en cola no cuentan)
+        comenzados = np.maximum(arribos - perdidos - en_cola, 1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.resultados = {
+                "fin": fin,
+                "paquetes": estado["emitidos"],
+                "salidas": salidas,
+                "perdidos_total": int(perdidos.sum()),
+                "permanencia_media": estado["permanencia_total"] / salidas if salidas else 0.0,
+                # Por nodo
+                "llegadas": arribos,
+                "perdidos": perdidos,
+                "atendidos": atendidos,
+                "prob_perdida": np.where(arribos > 0, perdidos / np.maximum(arribos, 1), 0.0),
+                "espera_media": np.array(estado["espera_total"]) / comenzados,
+                "utilizacion": area_ocupados / (self.servidores * fin) if fin > 0 else np.zeros(n),
+                "cola_media": area_cola / fin if fin > 0 else np.zeros(n),
+            }
+        return self.resultados
+
+    @staticmethod
+    def _servicio(u, distribucion, p1, p2):
+        # Por inversión del uniforme u, con las mismas fórmulas de Flujo
+        if distribucion == ENTERO:
+            return p1 + int((p2 - p1 + 1) * u)
+        if distribucion == EXPONENCIAL:
+            return -p1 * math.log(1.0 - u)
+        if distribucion == UNIFORME:
+            return p1 + (p2 - p1) * u
+        return p1
+
+
+def serie(semilla, nodos, servidores, capacidad_cola, tiempo_min, tiempo_max, tiempo_llegadas, total_paquetes):
+    # Caso frecuente: `nodos` etapas iguales en fila (router -> enlace -> servidor...)
+    enrutamiento = np.eye(nodos, k=1)
+    tiempos = np.full(nodos, math.inf)
+    tiempos[0] = tiempo_llegadas
+    return RedColas(semilla, np.full(nodos, servidores), capacidad_cola, ENTERO, tiempo_min, tiempo_max,
+                    enrutamiento, tiempos, total_paquetes)
+
+
+def replicas_red(semillas, capacidad_servidor, capacidad_cola, tiempo_procesamiento_min, tiempo_procesamiento_max,
+                 tiempo_llegadas, total_paquetes, bloque=1024):
+    # Muchas réplicas de SimulacionRed a la vez, una fila (carril) por semilla: el
+    # paquete k avanza en todos los carriles en el mismo paso de NumPy. Cada
+    # carril usa los flujos de FlujosAleatorios(semilla), así que reproduce la
+    # réplica de simpy con esa semilla. Con FIFO los inicios de servicio van en
+    # orden de llegada, por lo que alcanza con el instante en que se libera cada
+    # servidor y el inicio de los últimos capacidad_cola - 1 que esperaron (los
+    # únicos que pueden seguir en cola). Como en simpy, el paquete que encuentra
+    # los servidores ocupados se pierde si ya hay capacidad_cola - 1 esperando
+    filas = np.arange(len(semillas))
+    c = capacidad_servidor
+    lugares = capacidad_cola - 1
+    ancho = tiempo_procesamiento_max - tiempo_procesamiento_min + 1
+    flujos = [FlujosAleatorios(s) for s in semillas]
+    llegadas = [f["llegadas"] for f in flujos]
+    servicios = [f["servicio"] for f in flujos]
+
+    libres = np.zeros((len(filas), c))
+    cola = np.full((len(filas), max(lugares, 1)), -math.inf)  # inicios de los que esperaron
+    puntero = np.zeros(len(filas), dtype=np.int64)
+    reloj = np.zeros(len(filas))
+    procesados = np.zeros(len(filas), dtype=np.int64)
+    perdidos = np.zeros(len(filas), dtype=np.int64)
+    espera_total = np.zeros(len(filas))
+    tiempo_ocupado = np.zeros(len(filas))
+    # Servicios sorteados por adelantado: cada carril consume a su ritmo (sólo
+    # los admitidos) y en cada bloque se completa lo que le quedó sin usar
+    pendientes = [np.empty(0)] * len(filas)
+    usados = np.zeros(len(filas), dtype=np.int64)
+
+    hechos = 0
+    while hechos < total_paquetes:
+        n = min(bloque, total_paquetes - hechos)
+        hechos += n
+        # Suma secuencial desde el reloj de cada carril, como env.now + espera
+        esperas_llegada = np.array([f.exponenciales(tiempo_llegadas, n) for f in llegadas])
+        tiempos = np.cumsum(np.column_stack([reloj, esperas_llegada]), axis=1)[:, 1:]
+        reloj = tiempos[:, -1].copy()
+        pendientes = np.array([np.concatenate([pendientes[r][usados[r]:],
+                                               servicios[r].uniformes(bloque - len(pendientes[r]) + usados[r])])
+                               for r in filas.tolist()])
+        usados[:] = 0
+        tiempos_servicio = tiempo_procesamiento_min + np.floor(ancho * pendientes)
+
+        for j in range(n):
+            a = tiempos[:, j]
+            if c == 1:
+                servidor = 0
+                libre = libres[:, 0]
+            else:
+                servidor = libres.argmin(axis=1)
+                libre = libres[filas, servidor]
+            ocupados = libre > a
+            if lugares > 0:
+                pierde = ocupados & ((cola > a[:, None]).sum(axis=1) >= lugares)
+            else:
+                pierde = ocupados
+            admite = ~pierde
+            servicio = tiempos_servicio[filas, usados]
+            inicio = np.maximum(a, libre)
+            libres[filas, servidor] = np.where(admite, inicio + servicio, libre)
+            usados += admite
+            procesados += admite
+            perdidos += pierde
+            espera_total += np.where(admite, inicio - a, 0.0)
+            tiempo_ocupado += np.where(admite, servicio, 0.0)
+            if lugares > 0:
+                esperan = filas[admite & ocupados]
+                if len(esperan):
+                    cola[esperan, puntero[esperan]] = inicio[esperan]
+                    puntero[esperan] = (puntero[esperan] + 1) % lugares
+
+    fin = libres.max(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {
+            "procesados": procesados,
+            "perdidos": perdidos,
+            "tasa_perdida": perdidos / total_paquetes if total_paquetes else np.zeros(len(filas)),
+            "espera_media": np.where(procesados > 0, espera_total / np.maximum(procesados, 1), 0.0),
+            # Misma estimación que SimulacionRed y, aparte, la ocupación medida
+            "utilizacion": procesados * (tiempo_procesamiento_min + tiempo_procesamiento_max) / 2 / fin,
+            "tiempo_ocupado": tiempo_ocupado,
+            "fin": fin,
+        }
+
+
+if __name__ == "__main__":
+    import time
+
+    # Un router que reparte entre dos servidores en paralelo, que salen por un enlace común
+    red = RedColas(42, servidores=[1, 2, 1, 1], capacidad_cola=[10, 5, 5, 20],
+                   distribucion=[CONSTANTE, ENTERO, ENTERO, EXPONENCIAL],
+                   parametro_1=[0.5, 2, 4, 1.0], parametro_2=[0, 5, 8, 0],
+                   enrutamiento=[[0, 0.6, 0.4, 0], [0, 0, 0, 1], [0, 0, 0, 1], [0, 0, 0, 0]],
+                   tiempos_llegadas=[2, math.inf, math.inf, math.inf], total_paquetes=100000)
+    r = red.ejecutar()
+    print(f"Paquetes: {r['paquetes']}  salidas: {r['salidas']}  perdidos: {r['perdidos_total']}"
+          f"  permanencia media: {r['permanencia_media']:.2f}")
+    for i in range(len(red)):
+        print(f"  nodo {i}: llegadas {r['llegadas'][i]:7d}  pérdida {100 * r['prob_perdida'][i]:6.2f}%"
+              f"  espera {r['espera_media'][i]:7.3f}  utilización {100 * r['utilizacion'][i]:6.2f}%")
+
+    # Topología aleatoria de 200 nodos con un millón de paquetes
+    rng = np.random.default_rng(1)
+    n = 200
+    enrutamiento = (rng.random((n, n)) < 0.02) * rng.random((n, n))
+    enrutamiento *= 0.8 / np.maximum(enrutamiento.sum(axis=1, keepdims=True), 1e-12)
+    grande = RedColas(1, rng.integers(1, 4, n), 20, EXPONENCIAL, rng.uniform(0.5, 2, n), 0,
+                      enrutamiento, np.where(rng.random(n) < 0.1, 5.0, math.inf), 1000000)
+    inicio = time.perf_counter()
+    r = grande.ejecutar()
+    print(f"{n} nodos, {r['paquetes']} paquetes, {int(r['atendidos'].sum())} servicios:"
+          f" {time.perf_counter() - inicio:.1f} s")
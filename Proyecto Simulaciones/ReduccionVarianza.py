@@ -0,0 +1,150 @@
+import numpy as np
+from Aleatorios import FlujosAleatorios
+from Replicas import derivar_semillas, resumir, ejecutar_en_paralelo
+
+# Técnicas para lograr el mismo intervalo de confianza con menos réplicas:
+#   "antiteticas": pares de corridas con u y 1 - u en todos los flujos
+#   "control": variables de control con las medias conocidas del servicio y del
+#              tiempo entre llegadas (se corrige la respuesta por lo que la
+#              réplica se desvió de esas medias)
+#   "estratificado": grupos de réplicas que forman un hipercubo latino
+# Cada resultado informa el factor de reducción: cuántas veces menor es la
+# varianza del estimador que la de promediar la misma cantidad de corridas
+# independientes (también, cuántas corridas simples harían falta por cada una),
+# y ancho_relativo: el semiancho del intervalo dividido por el del intervalo
+# simple con esas corridas. Con pocos grados de libertad el cuantil t agranda el
+# intervalo y el ancho puede no bajar aunque el factor sea mayor que 1
+METODOS = ("simple", "antiteticas", "control", "estratificado")
+
+# Modelo -> respuesta por defecto
+INDICADORES = {"restaurante": "espera_media", "peluqueria": "tep", "red": "tasa_perdida"}
+
+
+"""
+Una réplica de cada modelo: respuesta y controles observados con su media teórica
+"""
+
+
+def _replica(tarea):
+    # Imports diferidos como en Replicas: cada proceso carga sólo su modelo
+    modelo, parametros, indicador, semilla, antitetico, estrato = tarea
+    flujos = FlujosAleatorios(semilla, antitetico, estrato)
+    if modelo == "restaurante":
+        from DiscretaRestaurante2 import RestauranteSimulacion
+        num_mesas, minimo, maximo, tiempo_llegadas, total = parametros
+        resultado = RestauranteSimulacion(semilla, *parametros, flujos=flujos).run()
+        respuesta = resultado.indicadores[indicador]
+        servicio = float((resultado.columna("fin") - resultado.columna("inicio")).mean())
+        llegadas = float(resultado.columna("llegada")[-1]) / total
+    elif modelo == "peluqueria":
+        from DiscretaPeluqueria import SimulacionPeluqueria
+        num_peluqueros, minimo, maximo, tiempo_llegadas, total = parametros
+        simulacion = SimulacionPeluqueria(semilla, *parametros, vectorizado=True, traza=False, flujos=flujos)
+        respuesta = simulacion.ejecutar_simulacion()[indicador]
+        servicio = simulacion.dt / total
+        llegadas = simulacion.ultima_llegada / total
+    elif modelo == "red":
+        from DiscretaSistemaRedes import SimulacionRed
+        capacidad_servidor, capacidad_cola, minimo, maximo, tiempo_llegadas, total = parametros
+        simulacion = SimulacionRed(semilla, *parametros, flujos=flujos)
+        respuesta = simulacion.ejecutar()[indicador]
+        servicio = simulacion.tiempo_ocupado / max(simulacion.paquetes_procesados, 1)
+        llegadas = simulacion.ultima_llegada / total
+    else:
+        raise ValueError(f"Modelo desconocido: {modelo}")
+    # Servicio uniforme (entero o continuo, la media es la misma) y llegadas exponenciales
+    return respuesta, (servicio, llegadas), ((minimo + maximo) / 2, tiempo_llegadas)
+
+
+"""
+Estimadores
+"""
+
+
+def grupos_minimos(replicas):
+    # El intervalo estratificado tiene grupos - 1 grados de libertad
+    return max(10, replicas // 4)
+
+
+def replicar(modelo, parametros, replicas=30, metodo="simple", indicador=None, semilla=1, grupos=None,
+             procesos=None, confianza=0.95):
+    # parametros: los del constructor del modelo sin la semilla. Con "antiteticas"
+    # se corren replicas // 2 pares; con "estratificado", `grupos` hipercubos de
+    # replicas // grupos corridas (el intervalo sale de las medias de los grupos;
+    # por defecto y como mínimo, grupos_minimos(replicas))
+    if metodo not in METODOS:
+        raise ValueError(f"Método desconocido: {metodo}")
+    indicador = indicador or INDICADORES[modelo]
+    parametros = tuple(parametros)
+
+    if metodo == "antiteticas":
+        semillas = derivar_semillas(semilla, replicas // 2)
+        tareas = [(modelo, parametros, indicador, s, antitetico, None) for s in semillas for antitetico in (False, True)]
+    elif metodo == "estratificado":
+        grupos = grupos_minimos(replicas) if grupos is None else grupos
+        if grupos < grupos_minimos(replicas):
+            raise ValueError(f"Con {replicas} réplicas hacen falta al menos {grupos_minimos(replicas)} grupos")
+        m = replicas // grupos
+        if m < 2:
+            raise ValueError("Cada grupo estratificado necesita al menos 2 réplicas")
+        comunes = derivar_semillas(semilla + 1, grupos)
+        semillas = derivar_semillas(semilla, m * grupos)
+        tareas = [(modelo, parametros, indicador, semillas[g * m + i], False, (i, m, comunes[g]))
+                  for g in range(grupos) for i in range(m)]
+    else:
+        tareas = [(modelo, parametros, indicador, s, False, None) for s in derivar_semillas(semilla, replicas)]
+
+    corridas = ejecutar_en_paralelo(_replica, tareas, procesos)
+    y = np.array([c[0] for c in corridas], dtype=float)
+    varianza_corrida = float(y.var(ddof=1))
+    gl = None
+
+    if metodo == "antiteticas":
+        valores = y.reshape(-1, 2).mean(axis=1)
+        # n pares contra 2n corridas independientes: σ² / 2n frente a var(par) / n
+        factor = varianza_corrida / (2 * valores.var(ddof=1))
+    elif metodo == "estratificado":
+        valores = y.reshape(grupos, -1).mean(axis=1)
+        factor = varianza_corrida / (y.size // grupos * valores.var(ddof=1))
+    elif metodo == "control":
+        controles = np.array([c[1] for c in corridas]) - np.array(corridas[0][2])
+        # β por mínimos cuadrados con ordenada; las desviaciones tienen media
+        # teórica 0. Cada réplica se corrige con el β ajustado sin ella (navaja):
+        # con el β de toda la muestra la varianza sale optimista. El intervalo
+        # pierde además un grado de libertad por control
+        diseno = np.column_stack([np.ones(len(y)), controles])
+        valores = np.empty_like(y)
+        for i in range(len(y)):
+            resto = np.arange(len(y)) != i
+            beta = np.linalg.lstsq(diseno[resto], y[resto], rcond=None)[0][1:]
+            valores[i] = y[i] - controles[i] @ beta
+        factor = varianza_corrida / valores.var(ddof=1)
+        gl = len(y) - 1 - controles.shape[1]
+    else:
+        valores = y
+        factor = 1.0
+
+    resumen = resumir(valores, confianza, gl)
+    simple = resumir(y, confianza)
+    resumen.update(metodo=metodo, indicador=indicador, corridas=len(corridas), factor=float(factor),
+                   corridas_equivalentes=float(factor * len(corridas)),
+                   ancho_relativo=float((resumen["ic"][1] - resumen["ic"][0]) / (simple["ic"][1] - simple["ic"][0])))
+    return resumen
+
+
+def comparar_metodos(modelo, parametros, replicas=30, metodos=METODOS, **opciones):
+    return {metodo: replicar(modelo, parametros, replicas, metodo, **opciones) for metodo in metodos}
+
+
+if __name__ == "__main__":
+    casos = [
+        ("restaurante", (5, 20, 40, 7, 2000)),
+        ("peluqueria", (2, 15, 30, 12, 2000)),
+        ("red", (1, 5, 2, 5, 3, 2000)),
+    ]
+    for modelo, parametros in casos:
+        print(f"{modelo} {parametros}")
+        for metodo, r in comparar_metodos(modelo, parametros, replicas=40).items():
+            print(f"  {metodo:<14} {r['indicador']} {r['media']:.4f}  IC [{r['ic'][0]:.4f}, {r['ic'][1]:.4f}]"
+                  f"  factor {r['factor']:5.2f}  ancho {r['ancho_relativo']:4.2f}"
+                  f"  ({r['corridas']} corridas ~ {r['corridas_equivalentes']:.0f} simples)")
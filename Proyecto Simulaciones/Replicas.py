@@ -0,0 +1,70 @@
+import os
+import math
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+INDICADORES_PELUQUERIA = ("lpc", "tep", "upi")
+
+
+def derivar_semillas(semilla, replicas):
+    # Una semilla entera independiente por réplica, derivada de la semilla base
+    # con SeedSequence: la réplica i recibe siempre la misma semilla
+    hijos = np.random.SeedSequence(semilla).spawn(replicas)
+    return [int(hijo.generate_state(1, np.uint64)[0]) for hijo in hijos]
+
+
+def resumir(valores, confianza=0.95, gl=None):
+    # Media, varianza muestral e intervalo de confianza t de Student. gl permite
+    # descontar grados de libertad (p. ej. por parámetros estimados con la muestra)
+    from scipy.special import stdtrit  # diferido: scipy tarda en importarse
+    valores = np.asarray(valores, dtype=float)
+    n = len(valores)
+    media = float(valores.mean())
+    gl = n - 1 if gl is None else gl
+    if n < 2 or gl < 1:
+        return {"n": n, "media": media, "varianza": math.nan, "ic": (math.nan, math.nan)}
+    varianza = float(valores.var(ddof=1))
+    margen = float(stdtrit(gl, (1 + confianza) / 2) * math.sqrt(varianza / n))
+    return {"n": n, "media": media, "varianza": varianza, "ic": (media - margen, media + margen)}
+
+
+def ejecutar_en_paralelo(funcion, tareas, procesos=None):
+    # Reparte las tareas en un pool de procesos y devuelve los resultados en el
+    # orden de entrada, de modo que el resultado no depende del planificador
+    tareas = list(tareas)
+    procesos = min(procesos or os.cpu_count() or 1, len(tareas))
+    if procesos <= 1:
+        return [funcion(tarea) for tarea in tareas]
+    # Bloques de varias tareas por envío para no pagar la comunicación por réplica
+    bloque = max(1, len(tareas) // (4 * procesos))
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        return list(pool.map(funcion, tareas, chunksize=bloque))
+
+
+def _replica_peluqueria(tarea):
+    # Import diferido: los demás modelos usan este módulo sin cargar la peluquería
+    from DiscretaPeluqueria import SimulacionPeluqueria
+    semilla, parametros, vectorizado = tarea
+    simulacion = SimulacionPeluqueria(semilla, *parametros, vectorizado=vectorizado, traza=False)
+    simulacion.ejecutar_simulacion()
+    return simulacion.indicadores
+
+
+def replicar_peluqueria(semilla, num_peluqueros, tiempo_corte_min, tiempo_corte_max, t_llegadas, tot_clientes,
+                        replicas, procesos=None, confianza=0.95, vectorizado=False):
+    parametros = (num_peluqueros, tiempo_corte_min, tiempo_corte_max, t_llegadas, tot_clientes)
+    tareas = [(s, parametros, vectorizado) for s in derivar_semillas(semilla, replicas)]
+    resultados = ejecutar_en_paralelo(_replica_peluqueria, tareas, procesos)
+
+    resumen = {}
+    for indicador in INDICADORES_PELUQUERIA:
+        resumen[indicador] = resumir([r[indicador] for r in resultados], confianza)
+    resumen["replicas"] = resultados
+    return resumen
+
+
+if __name__ == "__main__":
+    resumen = replicar_peluqueria(30, 1, 15, 30, 25, 5000, replicas=32)
+    for indicador in INDICADORES_PELUQUERIA:
+        r = resumen[indicador]
+        print(f"{indicador}: media {r['media']:.4f}  varianza {r['varianza']:.4f}  IC95% [{r['ic'][0]:.4f}, {r['ic'][1]:.4f}]")
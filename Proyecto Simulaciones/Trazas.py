@@ -0,0 +1,73 @@
+import csv
+from itertools import islice
+import numpy as np
+
+# Registro de las trazas binarias: instante de llegada y tamaño del paquete en
+# bytes. Tamaño 0 = desconocido (convertir_a_binaria de un CSV sin esa columna)
+TRAZA = np.dtype([("tiempo", "<f8"), ("tamano", "<u4")])
+
+# Paquetes que se pasan al modelo de una vez
+TAMANO_BLOQUE = 65536
+
+
+class TrazaBinaria:
+    # Trazas de millones de paquetes en registros TRAZA. El archivo se mapea en
+    # memoria y se recorre por bloques: sólo el bloque en curso pasa a Python
+    def __init__(self, ruta, tamano_bloque=TAMANO_BLOQUE):
+        self.ruta = ruta
+        self.tamano_bloque = tamano_bloque
+        self.registros = np.memmap(ruta, dtype=TRAZA, mode="r")
+
+    def __len__(self):
+        return len(self.registros)
+
+    def bloques(self):
+        # (tiempos, tamaños) como arreglos de a lo sumo tamano_bloque paquetes; un
+        # bloque sin ningún tamaño conocido trae None, como TrazaCSV
+        for inicio in range(0, len(self.registros), self.tamano_bloque):
+            bloque = self.registros[inicio:inicio + self.tamano_bloque]
+            tamanos = np.array(bloque["tamano"])
+            yield np.array(bloque["tiempo"]), tamanos if tamanos.any() else None
+
+
+class TrazaCSV:
+    # Exportaciones en CSV con encabezado (p. ej. de Wireshark): se leen por
+    # bloques de filas. Sin columna de tamaño los tamaños quedan en None
+    def __init__(self, ruta, columna_tiempo="tiempo", columna_tamano="tamano", tamano_bloque=TAMANO_BLOQUE):
+        self.ruta = ruta
+        self.columna_tiempo = columna_tiempo
+        self.columna_tamano = columna_tamano
+        self.tamano_bloque = tamano_bloque
+
+    def bloques(self):
+        with open(self.ruta, newline="", encoding="utf-8") as archivo:
+            lector = csv.reader(archivo)
+            encabezado = next(lector)
+            i_tiempo = encabezado.index(self.columna_tiempo)
+            i_tamano = encabezado.index(self.columna_tamano) if self.columna_tamano in encabezado else None
+            while True:
+                filas = list(islice(lector, self.tamano_bloque))
+                if not filas:
+                    return
+                tiempos = np.array([fila[i_tiempo] for fila in filas], dtype=float)
+                tamanos = None if i_tamano is None else np.array([fila[i_tamano] for fila in filas], dtype=np.uint32)
+                yield tiempos, tamanos
+
+
+def abrir_traza(ruta, **opciones):
+    # .csv por bloques de texto; cualquier otra extensión como registros TRAZA
+    if str(ruta).lower().endswith(".csv"):
+        return TrazaCSV(ruta, **opciones)
+    return TrazaBinaria(ruta, **opciones)
+
+
+def convertir_a_binaria(traza, ruta):
+    # Pasa una traza (p. ej. un CSV grande) a registros TRAZA, bloque a bloque,
+    # para que las corridas siguientes la lean mapeada en memoria
+    with open(ruta, "wb") as archivo:
+        for tiempos, tamanos in traza.bloques():
+            bloque = np.empty(len(tiempos), dtype=TRAZA)
+            bloque["tiempo"] = tiempos
+            bloque["tamano"] = 0 if tamanos is None else tamanos
+            bloque.tofile(archivo)
+    return TrazaBinaria(ruta)
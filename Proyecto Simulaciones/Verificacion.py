@@ -0,0 +1,78 @@
+import sys
+import argparse
+import numpy as np
+
+# Comprueba que los motores rápidos reproducen, número por número, a los modelos
+# de simpy con las mismas semillas. Se corre junto con Benchmarks.py después de
+# tocar un motor; sale con código 1 si encuentra alguna diferencia
+
+
+def verificar_drive_thru(semillas):
+    # DriveThruModel: run_kernel() contra run() en las dos disposiciones, con un
+    # horario que corta clientes en cada mostrador al cerrar
+    from DiscretaRestaurante import CustomerRecords, DriveThruConfig, DriveThruModel
+    diferencias = []
+    for semilla in semillas:
+        for mostradores in (2, 3):
+            for apertura, cierre, pico in ((10, 14, 12), (0, 3, 1)):
+                config = DriveThruConfig(hour_open=apertura, hour_close=cierre, peak_start=pico, peak_end=pico + 1,
+                                         num_counters=mostradores, seed=semilla)
+                simpy = DriveThruModel(config).run()
+                kernel = DriveThruModel(config, kernel=True).run()
+                caso = f"drive_thru semilla={semilla} mostradores={mostradores} horario={apertura}-{cierre}"
+                for campo in CustomerRecords.FIELDS + ("cancelled",):
+                    if not np.array_equal(simpy.records.column(campo), kernel.records.column(campo), equal_nan=True):
+                        diferencias.append(f"{caso}: columna {campo}")
+                for campo in ("customers", "served", "cancelled", "averageTimeService"):
+                    if getattr(simpy, campo) != getattr(kernel, campo):
+                        diferencias.append(f"{caso}: {campo} {getattr(simpy, campo)} != {getattr(kernel, campo)}")
+    return diferencias
+
+
+def verificar_replicas_red(semillas):
+    # replicas_red (todas las semillas en carriles) contra una SimulacionRed por
+    # semilla, con uno y varios servidores y colas de uno a cinco lugares
+    from DiscretaSistemaRedes import SimulacionRed
+    from RedColas import replicas_red
+    diferencias = []
+    for servidores in (1, 2, 3):
+        for cola in (1, 2, 5):
+            parametros = (servidores, cola, 2, 5, 3 / servidores, 3000)
+            carriles = replicas_red(semillas, *parametros, bloque=500)
+            for k, semilla in enumerate(semillas):
+                simulacion = SimulacionRed(semilla, *parametros)
+                resultados = simulacion.ejecutar()
+                caso = f"red semilla={semilla} servidores={servidores} cola={cola}"
+                esperados = dict(resultados, tiempo_ocupado=simulacion.tiempo_ocupado)
+                for campo in ("procesados", "perdidos", "tasa_perdida", "espera_media", "utilizacion",
+                              "tiempo_ocupado", "fin"):
+                    if esperados[campo] != carriles[campo][k]:
+                        diferencias.append(f"{caso}: {campo} {esperados[campo]} != {carriles[campo][k]}")
+    return diferencias
+
+
+VERIFICACIONES = {
+    "drive_thru": verificar_drive_thru,
+    "red_replicas": verificar_replicas_red,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara los motores rápidos con los modelos de simpy")
+    parser.add_argument("--casos", nargs="+", choices=list(VERIFICACIONES), default=list(VERIFICACIONES))
+    parser.add_argument("--semillas", type=int, default=5, help="cantidad de semillas por caso")
+    args = parser.parse_args()
+
+    semillas = list(range(1, args.semillas + 1))
+    fallas = 0
+    for caso in args.casos:
+        diferencias = VERIFICACIONES[caso](semillas)
+        for diferencia in diferencias:
+            print(f"  DIFERENCIA {diferencia}")
+        print(f"{caso:<24}{'FALLA' if diferencias else 'ok'}")
+        fallas += len(diferencias)
+    return 1 if fallas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,42 @@
 import customtkinter as ctk
 import os
+import sys
 import subprocess
+import importlib
+import threading
+
+# Archivo -> (módulo, ventana) que se abre dentro del mismo proceso.
+# None para los programas de consola, que siguen corriendo como proceso aparte
+SIMULACIONES = {
+    "ContinuoReaccionQuimica.py": ("ContinuoReaccionQuimica", "InterfazReaccionQuimica"),
+    "ContinuoReactorNuclear.py": ("ContinuoReactorNuclear", "InterfazSimulacionTermica"),
+    "DiscretaPeluqueria.py": ("DiscretaPeluqueria", "InterfazSimulacionPeluqueria"),
+    "DiscretaRestaurante.py": None,
+    "DiscretaRestaurante2.py": ("DiscretaRestaurante2", "RestaurantSimulationGUI"),
+    "DiscretaSistemaRedes.py": ("DiscretaSistemaRedes", "NetworkSimulationApp"),
+}
+
+# Dependencias pesadas que se pueden importar en segundo plano al abrir el menú
+MODULOS_PESADOS = ["numpy", "scipy.integrate", "simpy", "matplotlib"]
+
+def precalentar_modulos():
+    for nombre in MODULOS_PESADOS:
+        try:
+            importlib.import_module(nombre)
+        except ImportError:
+            pass
 
 class App(ctk.CTk):
-    def __init__(self):
+    def __init__(self, precalentar=True):
         super().__init__()
 
+        # Módulos de simulación ya cargados y ventanas abiertas
+        self.modulos = {}
+        self.ventanas = []
+
+        if precalentar:
+            threading.Thread(target=precalentar_modulos, daemon=True).start()
+
         # Configuración de la ventana principal
         self.title("Proyecto Simulaciones")
         self.geometry("500x300")
@@ -22,7 +53,7 @@ class App(ctk.CTk):
         label.grid(row=0, column=0, columnspan=2, pady=(0, 20), padx=10)
 
         # Lista de nombres de archivos
-        files = ["ContinuoReaccionQuimica.py", "ContinuoReactorNuclear.py", "DiscretaPeluqueria.py", "DiscretaRestaurante.py", "DiscretaRestaurante2.py", "DiscretaSistemaRedes.py"]
+        files = list(SIMULACIONES)
 
         # Crear y colocar los botones
         for i, file in enumerate(files):
@@ -49,14 +80,33 @@ class App(ctk.CTk):
         # Establecer la geometría de la ventana
         self.geometry(f'{window_width}x{window_height}+{x}+{y}')
 
+    def cargar_modulo(self, nombre):
+        # Sólo la primera apertura paga la importación; después se reutiliza el módulo
+        if nombre not in self.modulos:
+            self.modulos[nombre] = importlib.import_module(nombre)
+        return self.modulos[nombre]
+
     def open_file(self, filename):
         # Verificar si el archivo existe
-        if os.path.exists(filename):
-            # Abrir el archivo con el programa predeterminado
-            subprocess.run(["python", filename], check=True)
-        else:
+        if not os.path.exists(filename):
             print(f"El archivo {filename} no existe.")
+            return
+
+        destino = SIMULACIONES.get(filename)
+        if destino is None:
+            # Programa de consola: se lanza sin bloquear el menú
+            subprocess.Popen([sys.executable, filename])
+            return
+
+        modulo, clase = destino
+        ventana = getattr(self.cargar_modulo(modulo), clase)(self)
+        self.ventanas = [v for v in self.ventanas if v.winfo_exists()]
+        self.ventanas.append(ventana)
+        # Las CTkToplevel recién creadas pueden quedar detrás del menú
+        ventana.after(100, ventana.lift)
+        ventana.focus()
             
 # Empezar el programa
-app = App()
-app.mainloop()
+if __name__ == "__main__":
+    app = App()
+    app.mainloop()